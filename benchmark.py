@@ -0,0 +1,223 @@
+import argparse
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from map_generator import MapGenerator, Floor, BLOCKING
+from entities import Player, HostileEnemy
+from spatial_index import EnemyIndex, ItemIndex
+from components import EnemyStore
+from game_logic import handle_player_action
+from renderer import FrameRenderer
+import glyphs
+
+
+"""benchmark.py - замеры скорости горячих участков игры
+Запуск: python benchmark.py [--quick] [--output results.json] [--compare old.json]
+Для каждого размера (ширина x высота x этажи, число врагов) замеряются:
+генерация карты, update_fov, ходы врагов, handle_player_action и отрисовка кадра
+(в память, без терминала). Результаты пишутся в JSON; --compare сравнивает с
+прошлым запуском и отмечает регрессии."""
+
+
+# (ширина, высота, этажей, врагов)
+DEFAULT_CASES = [
+    (80, 24, 3, 10),
+    (200, 60, 10, 1000),
+    (1000, 300, 50, 10000),
+]
+QUICK_CASES = [
+    (80, 24, 3, 10),
+    (200, 60, 3, 1000),
+]
+MOVES = ['w', 'a', 's', 'd']
+
+
+def measure(func: Callable[[], None], repeat: int,
+            setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    # Выполняет func repeat раз и возвращает время одного вызова в миллисекундах;
+    # setup (если задан) вызывается перед каждым вызовом и в замер не входит
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        'calls': repeat,
+        'mean_ms': statistics.mean(times),
+        'median_ms': statistics.median(times),
+        'min_ms': min(times),
+        'max_ms': max(times),
+    }
+
+
+def walkable_cells(floor: Floor) -> List[Tuple[int, int]]:
+    width = floor.width
+    return [(i % width, i // width) for i, t in enumerate(floor.tile_types) if not BLOCKING[t]]
+
+
+def spawn_enemies(floor: Floor, floor_idx: int, count: int, rng: random.Random) -> List[HostileEnemy]:
+    cells = walkable_cells(floor)
+    enemies = []
+    for _ in range(count):
+        x, y = rng.choice(cells)
+        enemy = HostileEnemy(x, y, glyphs.DOG, "Злая собака", hp=20, defense=0, power=3, view_range=8)
+        enemy.current_floor = floor_idx
+        enemies.append(enemy)
+    return enemies
+
+
+def make_generator(width: int, height: int, num_floors: int, seed: int) -> MapGenerator:
+    # Число попыток разместить комнату растет с площадью этажа (15 на 80x24)
+    return MapGenerator(width=width, height=height, num_floors=num_floors,
+                        max_rooms=max(15, width * height // 128), seed=seed)
+
+
+def run_case(width: int, height: int, num_floors: int, num_enemies: int, seed: int,
+             repeat: int, workers: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    results = {}
+
+    results['generate_map'] = measure(lambda: make_generator(width, height, num_floors, seed).generate_map(),
+                                      max(1, repeat // 10))
+    if workers and workers > 1:
+        results['generate_map_parallel'] = measure(
+            lambda: make_generator(width, height, num_floors, seed).generate_map(workers),
+            max(1, repeat // 10))
+
+    dungeon = make_generator(width, height, num_floors, seed).generate_map()
+    floor = dungeon[0]
+    rng = random.Random(seed)
+    cells = walkable_cells(floor)
+
+    def fov():
+        x, y = rng.choice(cells)
+        floor.update_fov(x, y)
+    results['update_fov'] = measure(fov, repeat * 10)
+
+    start_x, start_y = floor.rooms[0].center
+    player = Player(start_x, start_y)
+    player.hp = player.max_hp = 10 ** 9
+    enemies = EnemyIndex(spawn_enemies(floor, 0, num_enemies, rng))
+    items = ItemIndex()
+    floor.update_fov(player.x, player.y)
+
+    def enemy_turns():
+        for enemy in enemies.on_floor(0):
+            enemy.take_turn(player, dungeon, rng)
+    enemy_result = measure(enemy_turns, repeat)
+    enemy_result['per_enemy_us'] = enemy_result['mean_ms'] * 1000 / max(1, num_enemies)
+    results['enemy_take_turn'] = enemy_result
+
+    # Те же ходы, когда состояние врагов лежит в столбцах EnemyStore и расстояния
+    # до игрока считаются одним проходом на весь ход
+    stored = EnemyIndex(spawn_enemies(floor, 0, num_enemies, rng), EnemyStore())
+
+    def enemy_turns_stored():
+        turn_enemies = stored.on_floor(0)
+        distances = stored.store.distances(player.x, player.y, [enemy._row for enemy in turn_enemies])
+        for enemy, distance in zip(turn_enemies, distances):
+            enemy.take_turn(player, dungeon, rng, distance)
+    stored_result = measure(enemy_turns_stored, repeat)
+    stored_result['per_enemy_us'] = stored_result['mean_ms'] * 1000 / max(1, num_enemies)
+    results['enemy_take_turn_stored'] = stored_result
+
+    def player_action():
+        handle_player_action(rng.choice(MOVES + [' ', 'g']), player, dungeon, enemies, items, "", [])
+    results['handle_player_action'] = measure(player_action, repeat * 10)
+
+    sink = io.StringIO()
+    renderer = FrameRenderer(sink)
+    renderer.render(player, dungeon, enemies, items, "")
+
+    def next_frame():
+        # Ход и FOV меняют кадр, но замеряется только сама отрисовка
+        handle_player_action(rng.choice(MOVES), player, dungeon, enemies, items, "", [])
+        floor.update_fov(player.x, player.y)
+        sink.seek(0)
+        sink.truncate()
+
+    def render():
+        renderer.render(player, dungeon, enemies, items, "")
+    render_result = measure(render, repeat, next_frame)
+    render_result['last_frame_chars'] = len(sink.getvalue())
+    results['render_game'] = render_result
+    return results
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    # Возвращает описания замеров, которые стали медленнее более чем на threshold
+    regressions = []
+    for case, benches in current['results'].items():
+        for name, result in benches.items():
+            old = baseline.get('results', {}).get(case, {}).get(name)
+            if not old:
+                continue
+            ratio = result['median_ms'] / old['median_ms'] if old['median_ms'] else 1.0
+            if ratio > 1 + threshold:
+                regressions.append(f"{case} {name}: {old['median_ms']:.3f} ms -> {result['median_ms']:.3f} ms "
+                                   f"(x{ratio:.2f})")
+    return regressions
+
+
+def parse_case(text: str) -> Tuple[int, int, int, int]:
+    # Формат: ШИРИНАxВЫСОТАxЭТАЖИxВРАГИ, например 200x60x10x1000
+    width, height, floors, count = (int(part) for part in text.lower().split('x'))
+    return width, height, floors, count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры скорости генерации, FOV, ИИ и отрисовки")
+    parser.add_argument('--quick', action='store_true', help="только небольшие размеры")
+    parser.add_argument('--case', action='append', type=parse_case,
+                        help="размер вида 200x60x10x1000 (ширина x высота x этажи x враги)")
+    parser.add_argument('--seed', type=int, default=12345)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="дополнительно замерить генерацию в пуле из стольких процессов")
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--compare', help="JSON прошлого запуска для поиска регрессий")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="допустимое замедление медианы (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    cases = args.case or (QUICK_CASES if args.quick else DEFAULT_CASES)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': {},
+    }
+    for width, height, num_floors, num_enemies in cases:
+        name = f"{width}x{height}x{num_floors}x{num_enemies}"
+        print(f"{name} ...", flush=True)
+        report['results'][name] = run_case(width, height, num_floors, num_enemies, args.seed, args.repeat,
+                                             args.workers)
+        for bench, result in report['results'][name].items():
+            print(f"    {bench:<22} {result['median_ms']:10.3f} ms")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print("РЕГРЕССИЯ: " + line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+from array import array
+from itertools import compress, repeat
+from math import hypot
+from operator import le, sub
+from typing import List, Optional
+
+
+"""components.py - хранение врагов столбцами (structure of arrays)
+EnemyStore - координаты, этаж, hp, defense, power и флаги состояния всех врагов
+в параллельных массивах; расстояния до игрока считаются одним проходом по столбцам
+stored(), stored_flag() - свойства, через которые объект врага читает и пишет свой столбец"""
+
+
+# Флаги состояния врага в столбце flags
+HOSTILE = 1
+AGGRAVATED = 2
+
+NO_FLOOR = -1  # этаж освобожденной строки
+
+
+def stored(name: str, slot):
+    """Свойство name: у врага в хранилище значение лежит в столбце store.<name>,
+    у врага вне хранилища - в обычном слоте slot (дескриптор __slots__ базового класса)."""
+    def get(self):
+        store = self._store
+        if store is None:
+            return slot.__get__(self)
+        return getattr(store, name)[self._row]
+
+    def set(self, value):
+        store = self._store
+        if store is None:
+            slot.__set__(self, value)
+        else:
+            getattr(store, name)[self._row] = value
+    return property(get, set)
+
+
+def stored_flag(flag: int, slot):
+    """Логическое свойство, которое в хранилище хранится битом flag столбца flags."""
+    def get(self):
+        store = self._store
+        if store is None:
+            return slot.__get__(self)
+        return bool(store.flags[self._row] & flag)
+
+    def set(self, value):
+        store = self._store
+        if store is None:
+            slot.__set__(self, value)
+        elif value:
+            store.flags[self._row] |= flag
+        else:
+            store.flags[self._row] &= ~flag
+    return property(get, set)
+
+
+class EnemyStore:
+    """Столбцы состояния врагов. Строка врага - enemy._row; объект остается тонким видом на нее.
+
+    Освобожденные строки переиспользуются. Подключается через EnemyIndex(store=...)."""
+
+    COLUMNS = ('x', 'y', 'current_floor', 'hp', 'defense', 'power')
+
+    def __init__(self):
+        self.x = array('i')
+        self.y = array('i')
+        self.current_floor = array('i')
+        self.hp = array('i')
+        self.defense = array('i')
+        self.power = array('i')
+        self.flags = array('B')
+        self.objects: List[Optional[object]] = []
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.objects) - len(self._free)
+
+    def add(self, enemy) -> None:
+        """Переносит состояние врага из его слотов в новую строку столбцов."""
+        values = [getattr(enemy, column) for column in self.COLUMNS]
+        # Нейтральные враги (у них есть aggravated) становятся опасными, только когда разозлены
+        aggravated = getattr(enemy, 'aggravated', None)
+        flags = HOSTILE if aggravated is None else (AGGRAVATED if aggravated else 0)
+        if self._free:
+            row = self._free.pop()
+            for column, value in zip(self.COLUMNS, values):
+                getattr(self, column)[row] = value
+            self.flags[row] = flags
+            self.objects[row] = enemy
+        else:
+            row = len(self.objects)
+            for column, value in zip(self.COLUMNS, values):
+                getattr(self, column).append(value)
+            self.flags.append(flags)
+            self.objects.append(enemy)
+        enemy._store, enemy._row = self, row
+
+    def remove(self, enemy) -> None:
+        """Возвращает состояние врага в его слоты и освобождает строку."""
+        row = enemy._row
+        values = [getattr(enemy, column) for column in self.COLUMNS]
+        aggravated = bool(self.flags[row] & AGGRAVATED)
+        enemy._store = None
+        for column, value in zip(self.COLUMNS, values):
+            setattr(enemy, column, value)
+        if hasattr(type(enemy), 'aggravated'):
+            enemy.aggravated = aggravated
+        self.current_floor[row] = NO_FLOOR
+        self.objects[row] = None
+        self._free.append(row)
+
+    def distances(self, px: int, py: int, rows: Optional[List[int]] = None) -> List[float]:
+        """Расстояния от (px, py) до строк rows (по умолчанию - до всех строк, индекс - _row),
+        одним проходом по столбцам."""
+        if rows is None:
+            xs, ys = self.x, self.y
+        else:
+            xs, ys = map(self.x.__getitem__, rows), map(self.y.__getitem__, rows)
+        return list(map(hypot, map(sub, xs, repeat(px)), map(sub, ys, repeat(py))))
+
+    def within(self, enemies: list, px: int, py: int, radius: float) -> list:
+        """Пары (враг, расстояние) для врагов из enemies не дальше radius от (px, py), в их порядке.
+        Кандидатов дает пространственный индекс, здесь считается только расстояние."""
+        distances = self.distances(px, py, [enemy._row for enemy in enemies])
+        mask = map(le, distances, repeat(radius))
+        return list(compress(zip(enemies, distances), mask))
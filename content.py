@@ -0,0 +1,147 @@
+import json
+import marshal
+import os
+import random
+from typing import Dict, List, Optional, Tuple
+
+
+"""content.py - игровые данные: загадки, описания врагов и предметов
+ContentRepository - читает JSON-файлы рядом с модулем один раз и держит их разобранными;
+разобранные данные кэшируются в __pycache__ и перечитываются, только если файл изменился
+RiddleDeck - колода загадок без повторов
+riddles(), item_definition(), enemy_definition(), drop_table() - данные общего репозитория"""
+
+
+CONTENT_DIR = os.path.dirname(os.path.abspath(__file__))
+QUESTIONS_FILE = 'questions.json'
+CONTENT_FILE = 'content.json'
+
+
+class ContentRepository:
+    """Загружает файлы данных при первом обращении и хранит их в памяти.
+
+    Путь берется относительно каталога игры, а не текущего каталога. Рядом с файлом в
+    __pycache__ лежит его разобранная копия (marshal) с mtime и размером исходника;
+    при несовпадении файл разбирается заново и кэш перезаписывается."""
+
+    def __init__(self, directory: str = CONTENT_DIR, cache_dir: Optional[str] = None):
+        self.directory = directory
+        self.cache_dir = cache_dir if cache_dir is not None else os.path.join(directory, '__pycache__')
+        self._loaded: Dict[str, object] = {}
+
+    def load(self, filename: str):
+        """Разобранное содержимое файла filename (читается один раз за процесс)."""
+        data = self._loaded.get(filename)
+        if data is None:
+            data = self._loaded[filename] = self._read(filename)
+        return data
+
+    def riddles(self) -> List[dict]:
+        return self.load(QUESTIONS_FILE).get('тюремные_загадки', [])
+
+    def item_definition(self, item_id: str) -> dict:
+        return self.load(CONTENT_FILE)['items'][item_id]
+
+    def enemy_definition(self, enemy_id: str) -> dict:
+        return self.load(CONTENT_FILE)['enemies'][enemy_id]
+
+    def drop_table(self) -> List[str]:
+        return self.load(CONTENT_FILE)['drops']
+
+    def _read(self, filename: str):
+        path = os.path.join(self.directory, filename)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cache_path = os.path.join(self.cache_dir, filename + '.marshal')
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_stamp, data = marshal.load(f)
+            if tuple(cached_stamp) == stamp:
+                return data
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # Кэш - только ускорение: если каталог недоступен для записи, работаем без него
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = cache_path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                marshal.dump((stamp, data), f)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            pass
+        return data
+
+
+class RiddleDeck:
+    """Загадки в перемешанном порядке: каждая выпадает один раз, пока колода не кончится.
+
+    Затем колода перемешивается заново, причем последняя загадка не идет первой."""
+
+    def __init__(self, riddles: List[dict], rng=random):
+        self.riddles = riddles
+        self.rng = rng
+        self._order: List[int] = []  # номера оставшихся загадок; берутся с конца
+        self._last: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.riddles)
+
+    def draw(self) -> Optional[dict]:
+        """Следующая загадка или None, если загадок нет."""
+        if not self.riddles:
+            return None
+        if not self._order:
+            self._shuffle()
+        self._last = self._order.pop()
+        return self.riddles[self._last]
+
+    def getstate(self) -> Tuple[List[int], int]:
+        """Номера еще не выпавших загадок и последней выпавшей (-1 - не было), для сохранения игры."""
+        return list(self._order), -1 if self._last is None else self._last
+
+    def setstate(self, state: Tuple[List[int], int]) -> None:
+        remaining, last = state
+        self._order = [index for index in remaining if 0 <= index < len(self.riddles)]
+        self._last = last if 0 <= last < len(self.riddles) else None
+
+    def _shuffle(self) -> None:
+        order = list(range(len(self.riddles)))
+        self.rng.shuffle(order)
+        if self._last is not None and len(order) > 1 and order[-1] == self._last:
+            order[0], order[-1] = order[-1], order[0]
+        self._order = order
+
+
+_repository = ContentRepository()
+_default_deck: Optional[RiddleDeck] = None
+
+
+def repository() -> ContentRepository:
+    return _repository
+
+
+def riddles() -> List[dict]:
+    return _repository.riddles()
+
+
+def item_definition(item_id: str) -> dict:
+    return _repository.item_definition(item_id)
+
+
+def enemy_definition(enemy_id: str) -> dict:
+    return _repository.enemy_definition(enemy_id)
+
+
+def drop_table() -> List[str]:
+    return _repository.drop_table()
+
+
+def default_deck() -> RiddleDeck:
+    """Общая колода на модуле random - для вызовов без игровой сессии."""
+    global _default_deck
+    if _default_deck is None:
+        _default_deck = RiddleDeck(riddles())
+    return _default_deck
@@ -1,9 +1,11 @@
 import os
+from colorama import Fore, Style
 from input_handler import get_char
 
 
 """dialog.py - диалоговые окна:
-display_dialog() - отображает диалоги с npc и меню выбора"""
+display_dialog() - отображает диалоги с npc и меню выбора
+display_inventory() - отображает инвентарь и возвращает номер выбранного предмета"""
 
 
 def display_dialog(title: str, message: str, options: list = None) -> int:
@@ -39,11 +41,41 @@ def display_dialog(title: str, message: str, options: list = None) -> int:
     if options:
         while True:
             key = get_char()
+            if key is None or key == '\x1b':
+                return -1  # Esc или ввод закончился
             try:
                 choice = int(key) - 1
                 if 0 <= choice < len(options):
                     return choice
-            except ValueError:
-                if key == '\x1b':
-                    return -1
-    return -1
\ No newline at end of file
+            except (TypeError, ValueError):
+                continue
+    return -1
+
+
+def display_inventory(items: list, equipped) -> int:
+    os.system('cls' if os.name == 'nt' else 'clear')
+    print("                                   "+Fore.GREEN+"ИНВЕНТАРЬ"+Fore.RESET)
+    print(" ")
+    print(f"Экипировано:"+Fore.RED+f" {equipped.name}"+Fore.RESET)
+    print(" ")
+
+    if not items:
+        print("Инвентарь пуст.")
+        return -1
+
+    for i, item in enumerate(items):
+        print(f"{i+1}. {item.name}")
+        print(" ")
+
+    print(Fore.LIGHTBLACK_EX+Style.DIM+"\n           Выберите предмет для использования (или Esc для выхода):"+Fore.RESET+Style.RESET_ALL)
+
+    while True:
+        key = get_char()
+        if key is None or key == '\x1b':
+            return -1  # Esc или ввод закончился
+        try:
+            index = int(key) - 1
+            if 0 <= index < len(items):
+                return index
+        except (TypeError, ValueError):
+            continue
@@ -0,0 +1,97 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+from map_generator import MapGenerator, Floor
+
+
+"""dungeon.py - подземелье, этажи которого генерируются по мере надобности
+Dungeon - ведет себя как список этажей: dungeon[i] генерирует этаж при первом обращении,
+prefetch() заранее строит соседние этажи в фоновом потоке"""
+
+
+class Dungeon:
+    """Список этажей MapGenerator, которые создаются при первом обращении.
+
+    Этаж зависит только от зерна генератора и своего номера (лестницы каждый этаж ставит сам),
+    поэтому порядок генерации не влияет на результат. Все генерации идут через один фоновый
+    поток - генератор хранит состояние и не должен работать в двух потоках сразу.
+    populate(floor_num, floor) вызывается в основном потоке, когда этаж впервые понадобился:
+    так враги и предметы появляются только на этажах, до которых дошел игрок."""
+
+    def __init__(self, generator: MapGenerator,
+                 populate: Optional[Callable[[int, Floor], None]] = None, prefetch: bool = True):
+        self.generator = generator
+        self.populate = populate
+        self._floors: List[Optional[Floor]] = [None] * generator.num_floors
+        self._pending: Dict[int, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dungeon') if prefetch else None
+
+    def __len__(self) -> int:
+        return len(self._floors)
+
+    def __getitem__(self, floor_num: int) -> Floor:
+        floor = self._floors[floor_num]
+        if floor is None:
+            floor = self._load(floor_num % len(self._floors))
+        return floor
+
+    def __iter__(self) -> Iterator[Floor]:
+        # Обход всех этажей генерирует недостающие; только готовые этажи отдает generated()
+        for floor_num in range(len(self._floors)):
+            yield self[floor_num]
+
+    def is_generated(self, floor_num: int) -> bool:
+        return self._floors[floor_num] is not None
+
+    def generated(self) -> Dict[int, Floor]:
+        """Уже созданные этажи: номер -> этаж."""
+        return {floor_num: floor for floor_num, floor in enumerate(self._floors) if floor is not None}
+
+    def set_floor(self, floor_num: int, floor: Floor) -> None:
+        """Кладет готовый этаж (например, из сохранения) без вызова populate."""
+        self._floors[floor_num] = floor
+
+    def prefetch(self, floor_num: int) -> None:
+        """Начинает генерацию этажа в фоне, если он существует и еще не построен."""
+        if self._executor is None or not 0 <= floor_num < len(self._floors):
+            return
+        if self._floors[floor_num] is None and floor_num not in self._pending:
+            self._pending[floor_num] = self._executor.submit(self._build, floor_num)
+
+    def prefetch_around(self, floor_num: int) -> None:
+        """Заранее строит этажи, на которые можно попасть по лестницам с floor_num."""
+        self.prefetch(floor_num + 1)
+        self.prefetch(floor_num - 1)
+
+    def generate_all(self, workers: Optional[int] = None) -> None:
+        """Строит сразу все недостающие этажи (при workers > 1 - в пуле процессов)."""
+        if all(floor is None for floor in self._floors) and not self._pending:
+            for floor_num, floor in enumerate(self.generator.generate_map(workers)):
+                self._place(floor_num, floor)
+        for floor_num in range(len(self._floors)):
+            self[floor_num]
+
+    def close(self) -> None:
+        """Останавливает фоновый поток, отменяя еще не начатые генерации."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _build(self, floor_num: int) -> Floor:
+        return self.generator.prepare_floor(self.generator.generate_floor(floor_num))
+
+    def _load(self, floor_num: int) -> Floor:
+        future = self._pending.pop(floor_num, None)
+        if future is not None:
+            floor = future.result()
+        elif self._executor is not None:
+            # Генерация идет через тот же поток, что и предзагрузка, чтобы не делить генератор
+            floor = self._executor.submit(self._build, floor_num).result()
+        else:
+            floor = self._build(floor_num)
+        self._place(floor_num, floor)
+        return floor
+
+    def _place(self, floor_num: int, floor: Floor) -> None:
+        self._floors[floor_num] = floor
+        if self.populate is not None:
+            self.populate(floor_num, floor)
@@ -1,23 +1,37 @@
 import random
-import json
 from typing import List, Tuple, Optional
-from colorama import Fore, Back, Style
+from colorama import Fore
 from statistic import Statistics
+import glyphs
+from glyphs import GLYPHS
+from pathfinding import distance_map_to
+import content
+from content import RiddleDeck
+from prototypes import ItemPrototype, item_prototype, enemy_prototype
+from components import AGGRAVATED, stored, stored_flag
     
 
 class Character:
     """Базовый класс для всех персонажей в игре."""
+
+    __slots__ = ('x', 'y', 'glyph', 'name', 'hp', 'max_hp', 'defense', 'power', 'current_floor', 'position_index')
     
-    def __init__(self, x: int, y: int, char: str, name: str, hp: int, defense: int, power: int):
+    def __init__(self, x: int, y: int, glyph: int, name: str, hp: int, defense: int, power: int):
         self.x = x
         self.y = y
-        self.char = char 
+        self.glyph = glyph
         self.name = name
         self.hp = hp
         self.max_hp = hp
         self.defense = defense
         self.power = power
         self.current_floor = 0
+        self.position_index = None
+
+    @property
+    def char(self) -> str:
+        """Строка, которой персонаж отрисовывается на карте."""
+        return GLYPHS[self.glyph]
     
     def move(self, dx: int, dy: int, game_map) -> bool:
         """Перемещает персонажа, если это возможно."""
@@ -27,8 +41,11 @@ class Character:
         new_y = self.y + dy
         
         if not floor.is_blocked(new_x, new_y):
+            old_x, old_y = self.x, self.y
             self.x = new_x
             self.y = new_y
+            if self.position_index is not None:
+                self.position_index.moved(self, old_x, old_y)
             return True
         return False
     
@@ -58,10 +75,9 @@ class Player(Character):
     """Класс игрового персонажа."""
     
     def __init__(self, x: int, y: int, name: str = "Заключенный"):
-        super().__init__(x, y, Style.BRIGHT + "\033[32;47m✧\033[0m" + Fore.RESET+ Back.RESET, 
-                         name, hp=100, defense=1, power=5)
+        super().__init__(x, y, glyphs.PLAYER, name, hp=100, defense=1, power=5)
         self.inventory = Inventory()
-        self.equipped_weapon = Weapon("Кулаки", '*', damage=0, color='white')
+        self.equipped_weapon = make_item('fists')
         self.inventory.weapon = self.equipped_weapon  # Просто сохраняем оружие напрямую
         self.statistics = Statistics()
         self.keys_found = 0
@@ -85,9 +101,9 @@ class Player(Character):
     def use_stairs(self, game_map) -> bool:
         """Использует лестницу для перехода между этажами."""
         floor = game_map[self.current_floor]
-        tile = floor.tiles[self.x][self.y]
+        tile_type = floor.tile_at(self.x, self.y)
         
-        if tile.tile_type == 4 and self.current_floor < len(game_map) - 1:
+        if tile_type == 4 and self.current_floor < len(game_map) - 1:
             self.current_floor += 1
             self.statistics.record_floor_visited(self.current_floor)
             next_floor = game_map[self.current_floor]
@@ -95,7 +111,7 @@ class Player(Character):
                 self.x, self.y = next_floor.stairs_down[0]
             return True
             
-        elif tile.tile_type == 5 and self.current_floor > 0:
+        elif tile_type == 5 and self.current_floor > 0:
             self.current_floor -= 1
             self.statistics.record_floor_visited(self.current_floor)
             prev_floor = game_map[self.current_floor]
@@ -118,12 +134,12 @@ class Player(Character):
         self.statistics.record_food_eaten()
         return health_recovered
     
-    def interact_with_character(self, game_map, enemies) -> Optional[Tuple[str, Optional['Character']]]:
+    def interact_with_character(self, game_map, enemies,
+                                riddles: Optional[RiddleDeck] = None) -> Optional[Tuple[str, Optional['Character']]]:
         """Взаимодействует с персонажем рядом с игроком."""
-        for enemy in enemies:
-            if enemy.current_floor == self.current_floor and self.distance_to(enemy) <= 1.5:
-                if hasattr(enemy, 'interact'):
-                    return enemy.interact(self)
+        for enemy, _ in enemies.near(self.current_floor, self.x, self.y):
+            if hasattr(enemy, 'interact'):
+                return enemy.interact(self, riddles)
         return None
 
     def has_all_keys(self) -> bool:
@@ -132,39 +148,63 @@ class Player(Character):
 
 
 class Enemy(Character):
-    """Базовый класс для всех врагов."""
-    
-    def __init__(self, x: int, y: int, char: str, name: str, hp: int, defense: int, power: int, xp_reward: int = None):
-        super().__init__(x, y, char, name, hp, defense, power)
+    """Базовый класс для всех врагов.
+
+    Если враг добавлен в components.EnemyStore, его координаты, этаж, hp, defense и power
+    хранятся в столбцах хранилища, а свойства ниже читают и пишут туда."""
+
+    __slots__ = ('xp_reward', 'weapon', '_store', '_row')
+
+    x = stored('x', Character.x)
+    y = stored('y', Character.y)
+    current_floor = stored('current_floor', Character.current_floor)
+    hp = stored('hp', Character.hp)
+    defense = stored('defense', Character.defense)
+    power = stored('power', Character.power)
+    
+    def __init__(self, x: int, y: int, glyph: int, name: str, hp: int, defense: int, power: int, xp_reward: int = None):
+        self._store = None
+        super().__init__(x, y, glyph, name, hp, defense, power)
         self.xp_reward = xp_reward if xp_reward is not None else hp
         self.weapon = None
     
-    def take_turn(self, player, game_map) -> Optional[str]:
-        """Выполняет ход врага. Возвращает строку сообщения, если произошло действие (например, атака)."""
+    def take_turn(self, player, game_map, rng=random, distance: Optional[float] = None) -> Optional[str]:
+        """Выполняет ход врага. Возвращает строку сообщения, если произошло действие (например, атака).
+
+        distance - расстояние до игрока, если оно уже посчитано (например, EnemyStore.distances)."""
         pass
     
-    def on_death(self) -> Optional['Item']:
+    def on_death(self, rng=random) -> Optional['Item']:
         """При смерти может выпасть предмет."""
         return None
 
+    def step_towards(self, player, game_map) -> bool:
+        """Делает шаг к игроку по общей для этажа карте расстояний. Возвращает True, если шаг сделан."""
+        step = distance_map_to(game_map[self.current_floor], player.x, player.y).step_from(self.x, self.y)
+        if step is None:
+            return False
+        return self.move(step[0], step[1], game_map)
+
 
 class HostileEnemy(Enemy):
     """Класс враждебного противника, атакующего игрока."""
+
+    __slots__ = ('view_range', 'has_key')
     
-    def __init__(self, x: int, y: int, char: str, name: str, hp: int, defense: int, power: int, 
+    def __init__(self, x: int, y: int, glyph: int, name: str, hp: int, defense: int, power: int, 
                  view_range: int = 6, weapon: 'Weapon' = None, has_key: bool = False):
-        super().__init__(x, y, char, name, hp, defense, power, weapon)
+        super().__init__(x, y, glyph, name, hp, defense, power, weapon)
         self.view_range = view_range
         self.weapon = weapon
         self.has_key = has_key
         
     
-    def take_turn(self, player, game_map) -> Optional[str]:
+    def take_turn(self, player, game_map, rng=random, distance: Optional[float] = None) -> Optional[str]:
         """Выполняет ход враждебного противника."""
         message = None
-        if self.distance_to(player) <= self.view_range:
+        if distance is None:
             distance = self.distance_to(player)
-            
+        if distance <= self.view_range:
             if distance <= 1.5:
                 damage = self.power
                 if self.weapon:
@@ -173,34 +213,19 @@ class HostileEnemy(Enemy):
                 weapon_name = f" с помощью {self.weapon.name}" if self.weapon else ""
                 message = Fore.RED + f"{self.name} атакует вас{weapon_name}, нанося {damage} урона!" + Fore.RESET
             else:
-                dx = 0
-                dy = 0
-                
-                if self.x < player.x:
-                    dx = 1
-                elif self.x > player.x:
-                    dx = -1
-                    
-                if self.y < player.y:
-                    dy = 1
-                elif self.y > player.y:
-                    dy = -1
-
-                if dx != 0 and self.move(dx, 0, game_map):
-                    return message
-                if dy != 0 and self.move(0, dy, game_map):
+                if self.step_towards(player, game_map):
                     return message
                 
-                if random.random() < 0.5:
-                    self.move(random.choice([-1, 0, 1]), random.choice([-1, 0, 1]), game_map)
+                if rng.random() < 0.5:
+                    self.move(rng.choice([-1, 0, 1]), rng.choice([-1, 0, 1]), game_map)
         else:
-            if random.random() < 0.5:
-                dx = random.choice([-1, 0, 1])
-                dy = random.choice([-1, 0, 1])
+            if rng.random() < 0.5:
+                dx = rng.choice([-1, 0, 1])
+                dy = rng.choice([-1, 0, 1])
                 self.move(dx, dy, game_map)
         return message
     
-    def on_death(self) -> Optional['Item']:
+    def on_death(self, rng=random) -> Optional['Item']:
         """При смерти может выпасть ключ."""
         if self.has_key:
             return Key(2)
@@ -209,10 +234,13 @@ class HostileEnemy(Enemy):
 
 class NeutralEnemy(Enemy):
     """Класс нейтрального персонажа, который не атакует первым."""
+
+    __slots__ = ('_aggravated', 'has_item', 'has_riddle', 'has_given_riddle', 'has_given_key',
+                 'riddle_failed', 'current_riddle')
     
-    def __init__(self, x: int, y: int, char: str, name: str, hp: int, defense: int, power: int, 
+    def __init__(self, x: int, y: int, glyph: int, name: str, hp: int, defense: int, power: int, 
                  weapon: 'Weapon' = None, has_item: bool = False, has_riddle: bool = False):
-        super().__init__(x, y, char, name, hp, defense, power)
+        super().__init__(x, y, glyph, name, hp, defense, power)
         self.aggravated = False
         self.weapon = weapon
         self.has_item = has_item
@@ -222,11 +250,13 @@ class NeutralEnemy(Enemy):
         self.riddle_failed = False
         self.current_riddle = None
     
-    def take_turn(self, player, game_map) -> Optional[str]:
+    def take_turn(self, player, game_map, rng=random, distance: Optional[float] = None) -> Optional[str]:
         """Выполняет ход нейтрального противника."""
         message = None
-        if self.aggravated and self.distance_to(player) <= 8:
-            if self.distance_to(player) <= 1.5:
+        if distance is None:
+            distance = self.distance_to(player)
+        if self.aggravated and distance <= 8:
+            if distance <= 1.5:
                 damage = self.power
                 if self.weapon:
                     damage += self.weapon.damage
@@ -234,27 +264,11 @@ class NeutralEnemy(Enemy):
                 weapon_name = f" {self.weapon.name}" if self.weapon else ""
                 message = Fore.RED + f"{self.name} атакует вас{weapon_name}, нанося {damage} урона!" + Fore.RESET
             else:
-                dx = 0
-                dy = 0
-                
-                if self.x < player.x:
-                    dx = 1
-                elif self.x > player.x:
-                    dx = -1
-                    
-                if self.y < player.y:
-                    dy = 1
-                elif self.y > player.y:
-                    dy = -1
-
-                if dx != 0 and self.move(dx, 0, game_map):
-                    return message
-                if dy != 0 and self.move(0, dy, game_map):
-                    return message
+                self.step_towards(player, game_map)
         else:
-            if random.random() < 0.3:
-                dx = random.choice([-1, 0, 1])
-                dy = random.choice([-1, 0, 1])
+            if rng.random() < 0.3:
+                dx = rng.choice([-1, 0, 1])
+                dy = rng.choice([-1, 0, 1])
                 self.move(dx, dy, game_map)
         return message
     
@@ -265,23 +279,13 @@ class NeutralEnemy(Enemy):
         if not aggravated_before and not self.is_dead():
             self.aggravated = True
     
-    def on_death(self) -> Optional['Item']:
+    def on_death(self, rng=random) -> Optional['Item']:
         """При смерти может выпасть предмет."""
         if self.has_item:
-            items = [
-                Food("Таракан", Style.BRIGHT + "\033[47;38;5;130m∿\033[0m" + Fore.RESET + Back.RESET + Style.RESET_ALL, 
-                     nutrition=1, color='brown'),
-                Food("Засохший хлеб", Style.BRIGHT + "\033[47;38;5;130m⬬\033[0m"+ Back.RESET + Style.RESET_ALL, 
-                     nutrition=5, color='tan'),
-                Weapon("Заточка", Style.BRIGHT + "\033[30;47m↾\033[0m" + Back.RESET + Fore.RESET + Style.RESET_ALL, 
-                       damage=7, color='silver'),
-                Food("Сгущенка", Style.BRIGHT + "\033[47;38;5;130m◎\033[0m" + Fore.RESET + Back.RESET + Style.RESET_ALL, 
-                     nutrition=20, color='white')
-            ]
-            return random.choice(items)
+            return make_item(rng.choice(content.drop_table()))
         return None
     
-    def interact(self, player) -> Tuple[str, Optional['NeutralEnemy']]:
+    def interact(self, player, riddles: Optional[RiddleDeck] = None) -> Tuple[str, Optional['NeutralEnemy']]:
         """Взаимодействие с нейтральным персонажем."""
         if self.aggravated or self.riddle_failed:
             return f"{self.name} агрессивно настроен и не хочет с вами разговаривать!", self
@@ -291,25 +295,27 @@ class NeutralEnemy(Enemy):
         
         if not self.has_given_riddle and self.has_riddle:
             self.has_given_riddle = True
-            return self.ask_riddle(player), self
+            return self.ask_riddle(player, riddles), self
         
         return f"{self.name} смотрит на вас, ожидая ответа на свою загадку.", self
     
-    def ask_riddle(self, player) -> str:
-        """Задает тюремную загадку."""
+    def ask_riddle(self, player, riddles: Optional[RiddleDeck] = None) -> str:
+        """Задает тюремную загадку из колоды riddles (по умолчанию - общая колода content)."""
         try:
-            with open('questions.json', 'r', encoding='utf-8') as f:
-                riddles_data = json.load(f)
-                
-            riddles = riddles_data.get('тюремные_загадки', [])
-            if not riddles:
+            deck = riddles if riddles is not None else content.default_deck()
+            riddle = deck.draw()
+            if riddle is None:
                 return f"{self.name} говорит: 'Хотел загадать тебе загадку, но что-то голова не варит...'"
             
-            self.current_riddle = random.choice(riddles)
+            self.current_riddle = riddle
             return f"{self.name} говорит: '{self.current_riddle['вопрос']}'"
         except Exception as e:
             return f"{self.name} говорит: 'Хотел загадать тебе загадку, но не смог: {str(e)}'"
     
+    def awaiting_answer(self) -> bool:
+        """Загадка задана, но на нее еще не ответили."""
+        return self.current_riddle is not None and not self.has_given_key and not self.riddle_failed
+
     def answer_riddle(self, answer_index: int, player) -> Tuple[bool, str]:
         """Проверяет ответ на загадку."""
         if not hasattr(self, 'current_riddle'):
@@ -330,13 +336,44 @@ class NeutralEnemy(Enemy):
             return False, f"{self.name} в ярости кричит: 'Неправильно! Ты нарушил воровской закон!'"
 
 
+NeutralEnemy.aggravated = stored_flag(AGGRAVATED, NeutralEnemy._aggravated)
+
+
 class Item:
-    """Базовый класс для всех предметов."""
+    """Базовый класс для всех предметов.
+
+    Неизменяемые свойства (имя, глиф, цвет, урон, сытность) лежат в прототипе ItemPrototype;
+    прототип общий для всех предметов вида, а сам предмет - отдельный маленький объект,
+    чтобы два одинаковых предмета в инвентаре оставались двумя записями."""
+
+    __slots__ = ('prototype',)
+    KIND = 'item'
     
-    def __init__(self, name: str, char: str, color: str = 'white'):
-        self.name = name
-        self.char = char
-        self.color = color
+    def __init__(self, name: str, glyph: int, color: str = 'white'):
+        self.prototype = ItemPrototype(self.KIND, name, glyph, color)
+
+    @classmethod
+    def from_prototype(cls, prototype: ItemPrototype) -> 'Item':
+        item = cls.__new__(cls)
+        item.prototype = prototype
+        return item
+
+    @property
+    def name(self) -> str:
+        return self.prototype.name
+
+    @property
+    def glyph(self) -> int:
+        return self.prototype.glyph
+
+    @property
+    def color(self) -> str:
+        return self.prototype.color
+
+    @property
+    def char(self) -> str:
+        """Строка, которой предмет отрисовывается на карте."""
+        return GLYPHS[self.prototype.glyph]
     
     def use(self, user) -> bool:
         """Использует предмет. Возвращает True, если предмет должен быть удален."""
@@ -345,11 +382,12 @@ class Item:
 
 class Key(Item):
     """Класс ключа для побега."""
+
+    __slots__ = ('key_number',)
+    KIND = 'key'
     
     def __init__(self, key_number: int = 1):
-        super().__init__(f"Ключ #{key_number}", 
-                        Style.BRIGHT + "\033[33;47m♔\033[0m" + Fore.RESET + Back.RESET, 
-                        color='yellow')
+        super().__init__(f"Ключ #{key_number}", glyphs.KEY, color='yellow')
         self.key_number = key_number
     
     def use(self, user: Player) -> bool:
@@ -359,10 +397,16 @@ class Key(Item):
 
 class Weapon(Item):
     """Класс оружия."""
+
+    __slots__ = ()
+    KIND = 'weapon'
     
-    def __init__(self, name: str, char: str, damage: int, color: str = 'red'):
-        super().__init__(name, char, color)
-        self.damage = damage
+    def __init__(self, name: str, glyph: int, damage: int, color: str = 'red'):
+        self.prototype = ItemPrototype(self.KIND, name, glyph, color, damage=damage)
+
+    @property
+    def damage(self) -> int:
+        return self.prototype.damage
     
     def use(self, user: Player) -> bool:
         """Экипировать оружие."""
@@ -374,15 +418,20 @@ class Weapon(Item):
 
 class Food(Item):
     """Класс еды."""
+
+    __slots__ = ()
+    KIND = 'food'
     
-    def __init__(self, name: str, char: str, nutrition: int, color: str = 'green'):
-        super().__init__(name, char, color)
-        self.nutrition = nutrition
+    def __init__(self, name: str, glyph: int, nutrition: int, color: str = 'green'):
+        self.prototype = ItemPrototype(self.KIND, name, glyph, color, nutrition=nutrition)
+
+    @property
+    def nutrition(self) -> int:
+        return self.prototype.nutrition
     
     def use(self, user: Player) -> bool:
         """Съесть пищу, восстановив здоровье."""
-        health_recovered = user.eat_food(self)
-        print(Fore.GREEN + f"Вы съели {self.name} и восстановили {health_recovered} здоровья." + Fore.RESET)
+        user.eat_food(self)
         return True
 
 
@@ -468,4 +517,24 @@ class Inventory:
         elif item in self.general_items:
             self.general_items.remove(item)
             return True
-        return False
\ No newline at end of file
+        return False
+
+
+ITEM_CLASSES = {cls.KIND: cls for cls in (Item, Weapon, Food)}
+
+
+def make_item(item_id: str) -> Item:
+    """Новый предмет item_id из content.json с общим прототипом этого вида."""
+    prototype = item_prototype(item_id)
+    return ITEM_CLASSES[prototype.kind].from_prototype(prototype)
+
+
+def make_enemy(enemy_id: str, x: int, y: int) -> Enemy:
+    """Создает врага по прототипу enemy_id в клетке (x, y)."""
+    proto = enemy_prototype(enemy_id)
+    weapon = make_item(proto.weapon) if proto.weapon else None
+    if proto.kind == 'neutral':
+        return NeutralEnemy(x, y, proto.glyph, proto.name, hp=proto.hp, defense=proto.defense, power=proto.power,
+                            weapon=weapon, has_item=proto.has_item, has_riddle=proto.has_riddle)
+    return HostileEnemy(x, y, proto.glyph, proto.name, hp=proto.hp, defense=proto.defense, power=proto.power,
+                        view_range=proto.view_range, weapon=weapon, has_key=proto.has_key)
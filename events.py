@@ -0,0 +1,22 @@
+"""events.py - события игрового хода
+GameEvent - то, что GameSession.step() сообщает интерфейсу вместо вывода на экран"""
+
+
+class GameEvent:
+    """Событие хода: вид (kind) и данные для интерфейса (data)."""
+
+    MESSAGE = 'message'      # text - сообщение под картой
+    DIALOG = 'dialog'        # title, text, options - окно разговора; при options ждет ход 'answer'
+    INVENTORY = 'inventory'  # items, equipped - содержимое инвентаря; выбор приходит ходом 'use'
+    VICTORY = 'victory'
+    GAME_OVER = 'game_over'
+    QUIT = 'quit'
+
+    __slots__ = ('kind', 'data')
+
+    def __init__(self, kind: str, **data):
+        self.kind = kind
+        self.data = data
+
+    def __repr__(self) -> str:
+        return f"GameEvent({self.kind!r}, {self.data!r})"
@@ -0,0 +1,82 @@
+from functools import lru_cache
+from typing import Set, Tuple
+
+
+"""fov.py - поле зрения (рекурсивный shadowcasting)
+compute_fov() - возвращает множество индексов клеток, видимых из точки (x, y)"""
+
+
+# Множители для перевода координат октанта (dx, dy) в координаты карты
+OCTANTS = [
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+]
+
+
+@lru_cache(maxsize=None)
+def row_extents(radius: int) -> Tuple[int, ...]:
+    # Для каждого ряда j (0..radius) - наибольшее |dx|, при котором dx² + j² <= radius².
+    # Считается один раз на радиус вместо проверки dx**2 + dy**2 для каждой клетки.
+    extents = []
+    for j in range(radius + 1):
+        dx = 0
+        while (dx + 1) ** 2 + j * j <= radius * radius:
+            dx += 1
+        extents.append(dx)
+    return tuple(extents)
+
+
+def compute_fov(tile_types: bytearray, width: int, height: int, x: int, y: int,
+                radius: int, opaque: bytes) -> Set[int]:
+    """Вычисляет видимые клетки из (x, y); opaque[tile_type] == 1 для плиток, закрывающих обзор."""
+    visible = {y * width + x}
+    extents = row_extents(radius)
+    for xx, xy, yx, yy in OCTANTS:
+        _cast_light(tile_types, width, height, opaque, visible, extents,
+                    x, y, 1, 1.0, 0.0, radius, xx, xy, yx, yy)
+    return visible
+
+
+def _cast_light(tile_types, width, height, opaque, visible, extents,
+                cx, cy, row, start, end, radius, xx, xy, yx, yy) -> None:
+    # Обходит один октант ряд за рядом, сужая диапазон наклонов [end, start] за стенами
+    if start < end:
+        return
+    new_start = start
+    for j in range(row, radius + 1):
+        extent = extents[j]
+        dx = -j - 1
+        dy = -j
+        blocked = False
+        while dx <= 0:
+            dx += 1
+            l_slope = (dx - 0.5) / (dy + 0.5)
+            r_slope = (dx + 0.5) / (dy - 0.5)
+            if start < r_slope:
+                continue
+            if end > l_slope:
+                break
+
+            map_x = cx + dx * xx + dy * xy
+            map_y = cy + dx * yx + dy * yy
+            if 0 <= map_x < width and 0 <= map_y < height:
+                index = map_y * width + map_x
+                if -dx <= extent:
+                    visible.add(index)
+                wall = opaque[tile_types[index]] == 1
+            else:
+                wall = True
+
+            if blocked:
+                if wall:
+                    new_start = r_slope
+                else:
+                    blocked = False
+                    start = new_start
+            elif wall and j < radius:
+                blocked = True
+                _cast_light(tile_types, width, height, opaque, visible, extents,
+                            cx, cy, j + 1, start, l_slope, radius, xx, xy, yx, yy)
+                new_start = r_slope
+        if blocked:
+            break
@@ -1,20 +1,28 @@
+import random
 from typing import List, Tuple, Optional
-from entities import Player, Enemy, Item, NeutralEnemy, Key, Weapon
-from colorama import Fore, Style, Back
+from entities import Player, NeutralEnemy, Key, Weapon, Food
 from map_generator import Floor
-from dialog import display_dialog
-from end_screen import display_victory_screen, display_game_over
-from input_handler import get_char
-import os
+from spatial_index import EnemyIndex, ItemIndex
+from events import GameEvent
+from rng import RandomStreams
+from content import RiddleDeck
 
 
 
 """game_logic.py - логика игры
-handle_player_action() - обработка действий игрока (движение, атака, использование предметов)"""
+handle_player_action() - обработка действий игрока (движение, атака, использование предметов).
+Ничего не выводит на экран: диалоги, инвентарь и конец игры сообщаются событиями GameEvent,
+а ответы игрока (вариант загадки, номер предмета) приходят действиями 'answer' и 'use' с choice."""
 
 
-def handle_player_action(action: str, player: Player, dungeon: List[Floor], enemies: List[Enemy], 
-                        items: List[Tuple[Item, int, int, int]], message: str) -> Tuple[bool, str, bool]:
+def handle_player_action(action: str, player: Player, dungeon: List[Floor], enemies: EnemyIndex, 
+                        items: ItemIndex, message: str, events: List[GameEvent],
+                        choice: Optional[int] = None,
+                        streams: Optional[RandomStreams] = None,
+                        riddles: Optional[RiddleDeck] = None) -> Tuple[bool, str, bool]:
+    # streams - генераторы сессии (без них выпадение предметов берет модуль random),
+    # riddles - колода загадок сессии (без нее - общая колода content)
+    loot_rng = streams.loot if streams else random
     player_moved = False
     running = True
 
@@ -29,12 +37,10 @@ def handle_player_action(action: str, player: Player, dungeon: List[Floor], enem
     elif action == ' ':
         target = None
         nearest_distance = 1.5
-        for enemy in enemies:
-            if enemy.current_floor == player.current_floor:
-                distance = player.distance_to(enemy)
-                if distance <= nearest_distance:
-                    target = enemy
-                    nearest_distance = distance
+        for enemy, distance in enemies.near(player.current_floor, player.x, player.y, nearest_distance):
+            if distance <= nearest_distance:
+                target = enemy
+                nearest_distance = distance
         if target:
             damage = player.attack(target)
             message = f"Вы атакуете {target.name} с помощью {player.equipped_weapon.name}, нанося {damage} урона!"
@@ -42,9 +48,9 @@ def handle_player_action(action: str, player: Player, dungeon: List[Floor], enem
                 message += f"\nВы убили {target.name}!"
                 player.statistics.record_enemy_killed()
                 if hasattr(target, 'on_death'):
-                    dropped_item = target.on_death()
+                    dropped_item = target.on_death(loot_rng)
                     if dropped_item:
-                        items.append((dropped_item, target.x, target.y, target.current_floor))
+                        items.add(dropped_item, target.x, target.y, target.current_floor)
                         message += f"\n{target.name} уронил {dropped_item.name}!"
                 enemies.remove(target)
             player_moved = True
@@ -57,75 +63,65 @@ def handle_player_action(action: str, player: Player, dungeon: List[Floor], enem
         else:
             message = "Здесь нет лестницы."
     elif action == 'g':
-        for i, (item, item_x, item_y, item_floor) in enumerate(items):
-            if item_x == player.x and item_y == player.y and item_floor == player.current_floor:
-                player.inventory.add_item(item)
-                message = f"Вы подняли {item.name}."
-                player.statistics.record_item_picked()
-                if isinstance(item, Key):
-                    player.keys_found += 1
-                    player.statistics.record_key_found()
-                    message = f"Вы нашли {item.name}! ({player.keys_found}/3)"
-                items.pop(i)
-                if player.has_all_keys():
-                    display_victory_screen(player)
-                    running = False
-                break
+        item = items.take(player.current_floor, player.x, player.y)
+        if item:
+            player.inventory.add_item(item)
+            message = f"Вы подняли {item.name}."
+            player.statistics.record_item_picked()
+            if isinstance(item, Key):
+                player.keys_found += 1
+                player.statistics.record_key_found()
+                message = f"Вы нашли {item.name}! ({player.keys_found}/3)"
+            if player.has_all_keys():
+                events.append(GameEvent(GameEvent.VICTORY))
+                running = False
         else:
             message = "Здесь нет предметов."
     elif action == 'f':
-        interaction_result = player.interact_with_character(dungeon, enemies)
+        interaction_result = player.interact_with_character(dungeon, enemies, riddles)
         if interaction_result:
             interaction_message, interacted_character = interaction_result
-            if isinstance(interacted_character, NeutralEnemy) and hasattr(interacted_character, 'current_riddle'):
-                riddle = interacted_character.current_riddle
-                options = riddle.get('варианты', [])
-                title = f"Разговор с {interacted_character.name}"
-                answer_idx = display_dialog(title, interaction_message, options)
-                if answer_idx >= 0:
-                    success, result_message = interacted_character.answer_riddle(answer_idx, player)
-                    display_dialog(title, result_message)
-                    if not success:
-                        message = result_message
-            else:
-                display_dialog(f"Разговор с {interacted_character.name}", interaction_message)
+            options = []
+            if isinstance(interacted_character, NeutralEnemy) and interacted_character.awaiting_answer():
+                options = interacted_character.current_riddle.get('варианты', [])
+            events.append(GameEvent(GameEvent.DIALOG, title=f"Разговор с {interacted_character.name}",
+                                    text=interaction_message, options=options))
         else:
             message = "Рядом никого нет для взаимодействия."
+    elif action == 'answer':
+        partner = _riddle_partner(player, enemies)
+        if partner and choice is not None and choice >= 0:
+            success, result_message = partner.answer_riddle(choice, player)
+            events.append(GameEvent(GameEvent.DIALOG, title=f"Разговор с {partner.name}",
+                                    text=result_message, options=[]))
+            if not success:
+                message = result_message
     elif action == 'i':
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("                                   "+Fore.GREEN+"ИНВЕНТАРЬ"+Fore.RESET)
-        print(" ")
-        print(f"Экипировано:"+Fore.RED+f" {player.equipped_weapon.name}"+Fore.RESET)
-        print(" ")
-        
+        events.append(GameEvent(GameEvent.INVENTORY, items=player.inventory.get_all_items(),
+                                equipped=player.equipped_weapon))
+    elif action == 'use':
         all_items = player.inventory.get_all_items()
-        if not all_items:
-            print("Инвентарь пуст.")
-        else:
-            for i, item in enumerate(all_items):
-                print(f"{i+1}. {item.name}")
-                print(" ")
-            
-            print(Fore.LIGHTBLACK_EX+Style.DIM+"\n           Выберите предмет для использования (или Esc для выхода):"+Fore.RESET+Style.RESET_ALL)
-            
-            while True:
-                key = get_char()
-                if key == '\x1b':
-                    break
-                
-                try:
-                    index = int(key) - 1
-                    if 0 <= index < len(all_items):
-                        item = all_items[index]
-                        if item.use(player):
-                            player.inventory.remove_item(item)
-                            if isinstance(item, Weapon) and item == player.equipped_weapon:
-                                message = f"Вы экипировали {item.name}."
-                        break
-                except ValueError:
-                    continue
+        if choice is not None and 0 <= choice < len(all_items):
+            item = all_items[choice]
+            hp_before = player.hp
+            # Еда убирает себя из инвентаря сама (Player.eat_food), остальное убирается здесь
+            if item.use(player):
+                if isinstance(item, Food):
+                    message = f"Вы съели {item.name} и восстановили {player.hp - hp_before} здоровья."
+                else:
+                    player.inventory.remove_item(item)
+                    if isinstance(item, Weapon) and item == player.equipped_weapon:
+                        message = f"Вы экипировали {item.name}."
     elif action == 'q':
-        display_game_over(player)
+        events.append(GameEvent(GameEvent.QUIT))
         running = False
 
-    return player_moved, message, running
\ No newline at end of file
+    return player_moved, message, running
+
+
+def _riddle_partner(player: Player, enemies: EnemyIndex) -> Optional[NeutralEnemy]:
+    # Собеседник рядом с игроком, который ждет ответа на загадку
+    for enemy, _ in enemies.near(player.current_floor, player.x, player.y):
+        if isinstance(enemy, NeutralEnemy) and enemy.awaiting_answer():
+            return enemy
+    return None
@@ -0,0 +1,178 @@
+from typing import List, Optional
+from entities import Player, Enemy
+from map_generator import MapGenerator, Floor
+from dungeon import Dungeon
+from game_setup import generate_floor_enemies, generate_floor_items, place_random_key
+from game_logic import handle_player_action
+from spatial_index import EnemyIndex, ItemIndex
+from components import EnemyStore
+from scheduler import EnemyScheduler
+from events import GameEvent
+from rng import RandomStreams
+from content import RiddleDeck
+import content
+
+
+"""game_session.py - игровая сессия без привязки к терминалу
+GameSession - владеет подземельем, игроком, врагами и предметами;
+step() выполняет одно действие игрока и возвращает список событий GameEvent.
+Этажи создаются и заселяются, когда игрок впервые до них доходит (см. dungeon.Dungeon)"""
+
+
+class GameSession:
+    """Состояние одной игры и ее пошаговое выполнение."""
+
+    def __init__(self, width: int = 80, height: int = 24, num_floors: int = 3,
+                 player_name: str = "Заключенный Жужун", workers: Optional[int] = None,
+                 seed: Optional[int] = None, prefetch: bool = True):
+        # workers > 1 - все этажи генерируются сразу, параллельно в пуле процессов;
+        # иначе этаж создается при первом посещении, а соседние строятся заранее в фоне (prefetch)
+        # seed - зерно игры; при одинаковом зерне и одинаковых действиях игра повторяется
+        self.rng = RandomStreams(seed)
+        self.seed = self.rng.seed
+        self.map_generator = MapGenerator(width=width, height=height, num_floors=num_floors,
+                                          seed=self.rng.map_seed)
+        self.enemies = EnemyIndex(store=EnemyStore())
+        self.items = ItemIndex()
+        self.scheduler: Optional[EnemyScheduler] = None
+        self.riddles = RiddleDeck(content.riddles(), self.rng.riddles)
+        # Этаж третьего ключа выбирается сразу, а сам ключ кладется, когда этаж будет создан
+        self.key_floor = self.rng.loot.randint(0, num_floors - 1)
+        self.dungeon = Dungeon(self.map_generator, self._populate, prefetch)
+        if workers and workers > 1:
+            self.dungeon.generate_all(workers)
+
+        start_x, start_y = self.dungeon[0].rooms[0].center
+        self.player = Player(start_x, start_y, player_name)
+        self._start()
+
+    @classmethod
+    def restore(cls, map_generator: MapGenerator, dungeon: Dungeon, player: Player,
+                enemies: EnemyIndex, items: ItemIndex, rng: RandomStreams, key_floor: int,
+                turn: int = 0, message: str = "", awake: List[Enemy] = (),
+                riddles: Optional[RiddleDeck] = None) -> 'GameSession':
+        """Сессия из готового состояния (например, загруженного save_game.load_game) без генерации.
+
+        Еще не созданные этажи dungeon будут заселены этой сессией при первом посещении;
+        awake - враги, которые бодрствовали при сохранении (в порядке их ходов)."""
+        session = cls.__new__(cls)
+        session.rng = rng
+        session.seed = rng.seed
+        session.map_generator = map_generator
+        session.enemies = enemies
+        session.items = items
+        session.scheduler = None
+        session.riddles = riddles if riddles is not None else RiddleDeck(content.riddles(), rng.riddles)
+        session.key_floor = key_floor
+        session.dungeon = dungeon
+        dungeon.populate = session._populate
+        session.player = player
+        session._start()
+        session.scheduler.restore_awake(player.current_floor, awake)
+        session.turn = turn
+        session.message = message
+        return session
+
+    def _start(self) -> None:
+        self.scheduler = EnemyScheduler(self.dungeon, self.enemies)
+        self.message = ""
+        self.running = True
+        self.turn = 0
+        self.realtime = False  # True - враги ходят только в tick(), а не после каждого хода игрока
+        self._update_fov()
+
+    def close(self) -> None:
+        """Останавливает фоновую генерацию этажей."""
+        self.dungeon.close()
+
+    def attach_telemetry(self, telemetry) -> None:
+        """Подключает журнал событий (telemetry.TelemetryLog) к статистике игрока;
+        номер хода, этаж и позиция берутся из сессии в момент события."""
+        player = self.player
+        player.statistics.attach_telemetry(
+            telemetry, lambda: (self.turn, player.current_floor, player.x, player.y))
+
+    def _populate(self, floor_num: int, floor: Floor) -> None:
+        # Расставляет врагов и предметы на только что созданном этаже. Генераторы берутся
+        # отдельно для каждого этажа, поэтому расстановка не зависит от порядка посещения
+        spawn_rng = self.rng.for_floor('spawn', floor_num)
+        for enemy in generate_floor_enemies(floor, floor_num, len(self.dungeon), spawn_rng):
+            self.enemies.append(enemy)
+            if self.scheduler is not None:
+                self.scheduler.add(enemy)
+        loot_rng = self.rng.for_floor('loot', floor_num)
+        for entry in generate_floor_items(floor, floor_num, loot_rng):
+            self.items.append(entry)
+        if floor_num == self.key_floor:
+            random_key = place_random_key(floor, floor_num, loot_rng)
+            if random_key:
+                self.items.append(random_key)
+
+    def step(self, action: Optional[str], choice: Optional[int] = None) -> List[GameEvent]:
+        """Выполняет действие игрока (и ход врагов, если ход потрачен).
+
+        action - клавиша ('w', 'a', 's', 'd', ' ', 'e', 'g', 'f', 'i', 'q')
+        или ответ интерфейса: 'answer' (вариант загадки) и 'use' (номер предмета) с choice."""
+        events: List[GameEvent] = []
+        if not self.running:
+            return events
+
+        player_moved, message, self.running = self._act(action, choice, events)
+        if player_moved:
+            self.turn += 1
+            self._update_fov()
+            if not self.realtime:
+                message = self._enemy_phase(events) or message
+
+        self.message = message
+        if message:
+            events.append(GameEvent(GameEvent.MESSAGE, text=message))
+        return events
+
+    def tick(self) -> List[GameEvent]:
+        """Такт реального времени: ход бодрствующих врагов независимо от действий игрока.
+
+        Используется вместе с realtime = True, при котором step() врагов не двигает.
+        Прошлое сообщение остается на экране, пока враги не скажут новое."""
+        events: List[GameEvent] = []
+        if not self.running:
+            return events
+        message = self._enemy_phase(events)
+        if message:
+            self.message = message
+            events.append(GameEvent(GameEvent.MESSAGE, text=message))
+        return events
+
+    def _act(self, action: Optional[str], choice: Optional[int], events: List[GameEvent]):
+        return handle_player_action(action, self.player, self.dungeon, self.enemies, self.items,
+                                    "", events, choice, self.rng, self.riddles)
+
+    def _update_fov(self) -> None:
+        self.dungeon[self.player.current_floor].update_fov(self.player.x, self.player.y)
+        self.dungeon.prefetch_around(self.player.current_floor)
+
+    def _enemy_phase(self, events: List[GameEvent]) -> str:
+        # Ход врагов и проверка смерти игрока; возвращает сообщение врагов
+        message = self._run_enemies()
+        if self.player.is_dead():
+            events.append(GameEvent(GameEvent.GAME_OVER))
+            self.running = False
+        return message
+
+    def _run_enemies(self) -> str:
+        # Ход бодрствующих врагов; возвращает последнее сообщение о их действиях
+        message = ""
+        awake = self.scheduler.update(self.player)
+        store = self.enemies.store
+        if store is None or not awake:
+            distances = [None] * len(awake)
+        else:
+            # Расстояния до игрока считаются одним проходом по строкам бодрствующих врагов; игрок
+            # в фазе врагов стоит на месте, а каждый враг двигает только себя, так что значения
+            # верны до его хода
+            distances = store.distances(self.player.x, self.player.y, [enemy._row for enemy in awake])
+        for enemy, distance in zip(awake, distances):
+            enemy_message = enemy.take_turn(self.player, self.dungeon, self.rng.ai, distance)
+            if enemy_message:
+                message = enemy_message
+        return message
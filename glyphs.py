@@ -0,0 +1,60 @@
+from typing import List
+from colorama import Fore, Back, Style
+
+
+"""glyphs.py - таблица глифов
+GLYPHS - строки отрисовки клеток, вычисленные один раз при загрузке модуля.
+Остальной код ссылается на глифы по номеру; смена темы или глубины цвета -
+это замена содержимого GLYPHS.
+register() - добавляет глиф в таблицу и возвращает его номер"""
+
+
+GLYPHS: List[str] = []
+
+
+def register(text: str) -> int:
+    GLYPHS.append(text)
+    return len(GLYPHS) - 1
+
+
+BLANK = register(" ")
+
+# Плитки: видимые в текущем ходу и только исследованные (по памяти игрока).
+# Списки индексируются типом плитки (Tile.EMPTY ... Tile.STAIRS_DOWN).
+TILE_VISIBLE = [
+    BLANK,
+    register("\033[47m \033[0m"),
+    register(Fore.LIGHTBLACK_EX + Back.BLACK + "▒" + Style.RESET_ALL),
+    register("\033[47m \033[0m"),
+    register(Style.BRIGHT + "\033[32;47m⬆\033[0m" + Style.RESET_ALL),
+    register(Style.BRIGHT + "\033[32;47m⬇\033[0m" + Style.RESET_ALL),
+]
+TILE_REMEMBERED = [
+    BLANK,
+    register("\033[100m \033[0m"),
+    register(Style.DIM + Fore.LIGHTBLACK_EX + Back.BLACK + "▒" + Style.RESET_ALL),
+    register("\033[100m \033[0m"),
+    register("\033[32;100m⬆\033[0m" + Style.RESET_ALL),
+    register("\033[32;100m⬇\033[0m" + Style.RESET_ALL),
+]
+
+# Персонажи
+PLAYER = register(Style.BRIGHT + "\033[32;47m✧\033[0m" + Fore.RESET + Back.RESET)
+DOG = register(Style.BRIGHT + "\033[91;47m✺\033[0m" + Back.RESET + Fore.RESET + Style.RESET_ALL)
+GUARD = register(Fore.LIGHTRED_EX + Style.BRIGHT + "\033[91;47m⚔︎\033[0m" + Fore.RESET + Style.RESET_ALL)
+SHOOTER = register(Fore.RED + Style.BRIGHT + "\033[91;47m➹\033[0m" + Fore.RESET + Back.RESET + Style.RESET_ALL)
+KEY_HOLDER = register("\033[91;47m➹\033[0m")
+OUTCAST = register(Style.BRIGHT + "\033[33;47m☻\033[0m" + Fore.RESET + Back.BLACK + Style.RESET_ALL)
+AUTHORITY = register(Fore.MAGENTA + Style.BRIGHT + "\033[95;47m⛛\033[0m" + Fore.RESET + Back.RESET)
+
+# Предметы
+FISTS = register("*")
+KEY = register(Style.BRIGHT + "\033[33;47m♔\033[0m" + Fore.RESET + Back.RESET)
+COCKROACH = register(Style.BRIGHT + "\033[47;38;5;130m∿\033[0m" + Fore.RESET + Back.RESET + Style.RESET_ALL)
+BREAD = register(Style.BRIGHT + "\033[47;38;5;130m⬬\033[0m" + Back.RESET + Style.RESET_ALL)
+SLOP = register(Style.BRIGHT + Fore.LIGHTWHITE_EX + "\033[47;38;5;130m✱\033[0m" + Fore.RESET + Back.RESET + Style.RESET_ALL)
+CONDENSED_MILK = register(Style.BRIGHT + "\033[47;38;5;130m◎\033[0m" + Fore.RESET + Back.RESET + Style.RESET_ALL)
+SHANK = register(Style.BRIGHT + "\033[30;47m↾\033[0m" + Back.RESET + Fore.RESET + Style.RESET_ALL)
+BATON = register(Style.BRIGHT + "\033[47;38;5;130m┤\033[0m" + Back.RESET + Style.RESET_ALL)
+PISTOL = register(Style.BRIGHT + "\033[47;30m⌐\033[0m" + Fore.RESET + Back.RESET + Style.RESET_ALL)
+PISTOL_PLAIN = register("\033[47;30m⌐\033[0m")
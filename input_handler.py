@@ -1,31 +1,291 @@
+import codecs
 import os
-import msvcrt
+import selectors
+import sys
+from collections import deque
+from typing import Deque, List, Optional
 
 
 """input_handler.py - обработка ввода с клавиатуры:
-get_char() - получает символ с клавиатуры"""
+InputSession - держит терминал в неканоническом режиме всю игру, читает все доступные байты
+сразу и складывает распознанные клавиши в очередь
+KeyDecoder - разбирает поток байтов на клавиши и escape-последовательности (стрелки и т.п.)
+get_char() - получает символ с клавиатуры (из активной InputSession или временной)"""
 
 
-# def get_char():
-#     return msvcrt.getch().decode('utf-8').lower()
+ESC = '\x1b'
+UP, DOWN, RIGHT, LEFT = 'up', 'down', 'right', 'left'
+RESIZE = 'resize'  # не клавиша: ожидание прервано wake() (например, терминал изменил размер)
 
-def get_char():
-    try:
-        if os.name == 'nt':  
-            ch = msvcrt.getch()
-            if ch == b'\xe0': 
-                ch = msvcrt.getch()
-                return None
-            return ch.decode('latin-1').lower()
-        else:  
-            import tty, termios
-            fd = sys.stdin.fileno()
-            old_settings = termios.tcgetattr(fd)
+# Последний символ последовательностей ESC [ x и ESC O x -> имя клавиши
+SEQUENCES = {'A': UP, 'B': DOWN, 'C': RIGHT, 'D': LEFT}
+# Второй байт расширенных клавиш Windows (после b'\xe0' или b'\x00')
+WINDOWS_KEYS = {'H': UP, 'P': DOWN, 'M': RIGHT, 'K': LEFT}
+
+ESC_TIMEOUT = 0.05  # сколько ждать продолжения после одиночного ESC, прежде чем считать его клавишей Esc
+READ_SIZE = 1024
+
+
+class KeyDecoder:
+    """Конечный автомат: байты терминала -> клавиши.
+
+    Обычные символы (в том числе кириллица в UTF-8) выдаются в нижнем регистре, стрелки -
+    именами UP/DOWN/RIGHT/LEFT, одиночный ESC - символом ESC. Неизвестные последовательности
+    CSI (ESC [ ... буква) отбрасываются целиком, чтобы их хвост не превратился в ходы."""
+
+    GROUND, ESCAPE, CSI, SS3 = range(4)
+
+    def __init__(self):
+        self.state = self.GROUND
+        self._utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def feed(self, data: bytes) -> List[str]:
+        keys = []
+        for ch in self._utf8.decode(data):
+            state = self.state
+            if state == self.GROUND:
+                if ch == ESC:
+                    self.state = self.ESCAPE
+                else:
+                    keys.append(ch.lower())
+            elif state == self.ESCAPE:
+                if ch == '[':
+                    self.state = self.CSI
+                elif ch == 'O':
+                    self.state = self.SS3
+                elif ch == ESC:
+                    keys.append(ESC)
+                else:
+                    # Alt+клавиша или ESC, за которым сразу нажали клавишу: выдаем оба
+                    keys.append(ESC)
+                    keys.append(ch.lower())
+                    self.state = self.GROUND
+            elif state == self.CSI:
+                # Параметры (цифры, ';') пропускаются до завершающего символа
+                if '@' <= ch <= '~':
+                    key = SEQUENCES.get(ch)
+                    if key is not None:
+                        keys.append(key)
+                    self.state = self.GROUND
+            else:
+                key = SEQUENCES.get(ch)
+                if key is not None:
+                    keys.append(key)
+                self.state = self.GROUND
+        return keys
+
+    def pending_escape(self) -> bool:
+        """Был прочитан ESC, и пока неясно - это клавиша Esc или начало последовательности."""
+        return self.state == self.ESCAPE
+
+    def flush(self) -> List[str]:
+        """Завершает незаконченную последовательность: одиночный ESC становится клавишей Esc."""
+        keys = [ESC] if self.state == self.ESCAPE else []
+        self.state = self.GROUND
+        return keys
+
+
+class InputSession:
+    """Ввод с клавиатуры на время всей игры.
+
+    В Unix терминал один раз переводится в неканонический режим без эха (ISIG и OPOST
+    остаются включены: Ctrl+C работает, а '\\n' при выводе переводит строку), а при выходе
+    восстанавливается. Байты читаются пачками через selectors, поэтому быстро набранные или
+    зажатые клавиши копятся в очереди, а не теряются между кадрами.
+    wake() из обработчика сигнала прерывает ожидание: get_key() вернет RESIZE, и игра
+    перерисует кадр, не дожидаясь нажатия (канал "self-pipe" в том же селекторе).
+    В Windows используется msvcrt (импортируется только там)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdin
+        self.keys: Deque[str] = deque()
+        self.decoder = KeyDecoder()
+        self.closed = False
+        self._fd: Optional[int] = None
+        self._saved_mode = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._wake_read: Optional[int] = None
+        self._wake_write: Optional[int] = None
+        self._msvcrt = None
+
+    def __enter__(self) -> 'InputSession':
+        self.open()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def open(self) -> None:
+        global _active
+        if os.name == 'nt':
+            import msvcrt
+            self._msvcrt = msvcrt
+        else:
+            self._fd = self.stream.fileno()
+            self._enter_raw_mode()
+            self._wake_read, self._wake_write = os.pipe()
+            os.set_blocking(self._wake_read, False)
+            os.set_blocking(self._wake_write, False)
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._fd, selectors.EVENT_READ)
+            self._selector.register(self._wake_read, selectors.EVENT_READ)
+        _active = self
+
+    def close(self) -> None:
+        global _active
+        if _active is self:
+            _active = None
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+        if self._wake_read is not None:
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+            self._wake_read = self._wake_write = None
+        if self._saved_mode is not None:
+            import termios
+            termios.tcsetattr(self._fd, termios.TCSADRAIN, self._saved_mode)
+            self._saved_mode = None
+
+    def get_key(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Следующая клавиша; ждет не дольше timeout секунд (None - без ограничения).
+        Возвращает None, если клавиши не было или ввод закончился."""
+        if not self.keys:
+            self._fill(timeout)
+        return self.keys.popleft() if self.keys else None
+
+    def pending(self) -> int:
+        """Сколько клавиш уже лежит в очереди."""
+        return len(self.keys)
+
+    def fileno(self) -> Optional[int]:
+        """Дескриптор, готовность которого можно ждать в цикле событий (None в Windows)."""
+        return self._fd
+
+    def read_available(self) -> None:
+        """Дочитывает пришедшие байты в очередь, не дожидаясь одиночного ESC
+        (для цикла событий: он сам вызывает flush_escape() через ESC_TIMEOUT)."""
+        if self._msvcrt is not None:
+            if self._msvcrt.kbhit():
+                self._fill_windows(None)
+        elif not self.closed:
+            self._read_available()
+
+    def wake_fileno(self) -> Optional[int]:
+        """Дескриптор канала wake() для цикла событий (None в Windows)."""
+        return self._wake_read
+
+    def wake(self) -> None:
+        """Прерывает ожидание клавиши. Безопасно вызывать из обработчика сигнала."""
+        if self._wake_write is not None:
             try:
-                tty.setraw(sys.stdin.fileno())
-                ch = sys.stdin.read(1)
-            finally:
-                termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-            return ch.lower()
-    except:
-        return None
\ No newline at end of file
+                os.write(self._wake_write, b'\0')
+            except (BlockingIOError, OSError):
+                pass  # канал уже полон или закрыт - ожидание и так будет прервано
+
+    def drain_wake(self) -> None:
+        """Опустошает канал wake() и кладет в очередь один RESIZE."""
+        try:
+            while os.read(self._wake_read, 64):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        if RESIZE not in self.keys:
+            self.keys.append(RESIZE)
+
+    def flush_escape(self) -> None:
+        """Считает недочитанный одиночный ESC клавишей Esc."""
+        if self.decoder.pending_escape():
+            self.keys.extend(self.decoder.flush())
+
+    def _fill(self, timeout: Optional[float]) -> None:
+        if self._msvcrt is not None:
+            self._fill_windows(timeout)
+            return
+        if self.closed or not self._wait(timeout):
+            return
+        # Одиночный ESC: если продолжение не пришло сразу, это клавиша Esc
+        while self.decoder.pending_escape() and not self.closed:
+            if not self._wait(ESC_TIMEOUT):
+                self.keys.extend(self.decoder.flush())
+                break
+
+    def _wait(self, timeout: Optional[float]) -> bool:
+        # Ждет ввод или wake() и забирает то, что пришло; False - не пришло ничего
+        ready = self._selector.select(timeout)
+        for key, _ in ready:
+            if key.fd == self._wake_read:
+                self.drain_wake()
+            else:
+                self._read_available()
+        return bool(ready)
+
+    def _read_available(self) -> None:
+        data = os.read(self._fd, READ_SIZE)
+        if not data:
+            self.closed = True
+            self.keys.extend(self.decoder.flush())
+            return
+        self.keys.extend(self.decoder.feed(data))
+
+    def _fill_windows(self, timeout: Optional[float]) -> None:
+        msvcrt = self._msvcrt
+        if timeout is not None and not msvcrt.kbhit():
+            import time
+            deadline = time.monotonic() + timeout
+            while not msvcrt.kbhit():
+                if time.monotonic() >= deadline:
+                    return
+                time.sleep(0.01)
+        # Первая клавиша ждется блокирующим getwch, остальные забираются, пока kbhit
+        while True:
+            ch = msvcrt.getwch()
+            if ch in ('\xe0', '\x00'):
+                key = WINDOWS_KEYS.get(msvcrt.getwch())
+                if key is not None:
+                    self.keys.append(key)
+            else:
+                self.keys.append(ch.lower())
+            if not msvcrt.kbhit():
+                break
+
+    def _enter_raw_mode(self) -> None:
+        import termios
+        try:
+            mode = termios.tcgetattr(self._fd)
+        except termios.error:
+            return  # ввод не из терминала (например, из файла) - режим менять не нужно
+        self._saved_mode = mode
+        raw = termios.tcgetattr(self._fd)
+        raw[0] &= ~(termios.ICRNL | termios.IXON)            # iflag: Enter дает '\r', Ctrl+S не останавливает вывод
+        raw[3] &= ~(termios.ICANON | termios.ECHO | termios.IEXTEN)  # lflag: без строк и эха, ISIG остается
+        raw[6][termios.VMIN] = 1
+        raw[6][termios.VTIME] = 0
+        termios.tcsetattr(self._fd, termios.TCSADRAIN, raw)
+
+
+_active: Optional[InputSession] = None
+_fallback = InputSession()  # для get_char() вне активной сессии; очередь сохраняется между вызовами
+
+
+def get_char() -> Optional[str]:
+    """Следующая клавиша из активной InputSession; без нее терминал переводится в нужный
+    режим только на время одного нажатия. RESIZE пропускается: экраны, которые ждут
+    get_char(), не перерисовываются."""
+    if _active is not None:
+        key = _active.get_key()
+        while key == RESIZE:
+            key = _active.get_key()
+        return key
+    while _fallback.keys:
+        key = _fallback.keys.popleft()
+        if key != RESIZE:
+            return key
+    try:
+        with _fallback:
+            key = _fallback.get_key()
+            while key == RESIZE:
+                key = _fallback.get_key()
+            return key
+    except (OSError, ValueError, ImportError):
+        return None
@@ -1,53 +1,158 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from introductory_screen import show_title_screen, transition_to_game
-from map_generator import MapGenerator
-from entities import Player
-from game_setup import generate_enemies, generate_items
-from renderer import render_game
-from game_logic import handle_player_action
-from input_handler import get_char
+from game_session import GameSession
+from save_game import save_game, load_game
+from events import GameEvent
+from renderer import render_game, invalidate_frame, frame_renderer
+from input_handler import InputSession, RESIZE
+from dialog import display_dialog, display_inventory
+from realtime import run_realtime
+from profiler import Profiler
+from telemetry import TelemetryLog
+from replay import Recorder
 from end_screen import display_game_over, display_victory_screen
+from rng import SEED_MIN, SEED_MAX
+
+
+"""main.py - терминальный интерфейс игры поверх GameSession
+handle_events() - показывает диалоги, инвентарь и финальные экраны, о которых сообщила сессия;
+при выходе по 'q' игра сохраняется в файл --save и продолжается с --load;
+с --realtime враги ходят в реальном времени (см. realtime.py), с --profile ходы замеряются (profiler.py),
+с --telemetry события игры пишутся в журнал (telemetry.py); ввод записывается в --record (replay.py)
+create_session() - новая или загруженная сессия; main строит ее в фоне, пока идет заставка
+(кроме --workers: пул процессов создается только из главного потока)"""
+
+
+def handle_events(session: GameSession, events: List[GameEvent], save_path: Optional[str] = None) -> None:
+    for event in events:
+        if event.kind == GameEvent.DIALOG:
+            options = event.data['options']
+            answer_idx = display_dialog(event.data['title'], event.data['text'], options)
+            if options and answer_idx >= 0:
+                handle_events(session, session.step('answer', answer_idx), save_path)
+            invalidate_frame()
+        elif event.kind == GameEvent.INVENTORY:
+            index = display_inventory(event.data['items'], event.data['equipped'])
+            if index >= 0:
+                handle_events(session, session.step('use', index), save_path)
+            invalidate_frame()
+        elif event.kind == GameEvent.VICTORY:
+            display_victory_screen(session.player)
+        elif event.kind == GameEvent.QUIT:
+            if save_path:
+                save_game(session, save_path)
+            display_game_over(session.player)
+        elif event.kind == GameEvent.GAME_OVER:
+            display_game_over(session.player)
+
+
+def seed_arg(text: str) -> int:
+    # Зерно для --seed: целое число, которое помещается в сохранение и запись
+    seed = int(text)
+    if not SEED_MIN <= seed <= SEED_MAX:
+        raise argparse.ArgumentTypeError(f"зерно должно быть от {SEED_MIN} до {SEED_MAX}")
+    return seed
+
+
+def create_session(args: argparse.Namespace) -> GameSession:
+    if args.load:
+        return load_game(args.load)
+    return GameSession(width=args.width, height=args.height, num_floors=args.floors,
+                       workers=args.workers, seed=args.seed)
+
 
 if __name__ == "__main__":
-    
-    show_title_screen()
-    transition_to_game()
-
-    # Инициализация карты и игрока
-    map_generator = MapGenerator(width=80, height=24, num_floors=3)
-    dungeon = map_generator.generate_map()
-    start_x, start_y = dungeon[0].rooms[0].center
-    player = Player(start_x, start_y, "Заключенный Жужун")
-
-    # Инициализация врагов и предметов
-    enemies = generate_enemies(dungeon)
-    items = generate_items(dungeon)
-    random_key = map_generator.generate_random_key(dungeon)
-    if random_key:
-        items.append(random_key)
-
-    running = True
-    message = ""
-    dungeon[player.current_floor].update_fov(player.x, player.y)
-
-    while running:
-        current_message = ""
-        render_game(player, dungeon, enemies, items, message)
-        action = get_char()
-        player_moved, action_message, running = handle_player_action(action, player, dungeon, enemies, items, current_message)
-        if action_message:
-            current_message = action_message  
-
-        if player_moved:
-            dungeon[player.current_floor].update_fov(player.x, player.y)
-            enemies_on_floor = [e for e in enemies if e.current_floor == player.current_floor]
-            for enemy in enemies_on_floor:
-                if dungeon[player.current_floor].tiles[enemy.x][enemy.y].explored:
-                    enemy_message = enemy.take_turn(player, dungeon)
-                    if enemy_message:
-                        current_message = enemy_message  
-
-            if player.is_dead():
-                display_game_over(player)
-                running = False
-
-        message = current_message
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Тюремный рогалик")
+    parser.add_argument('--width', type=int, default=80, help="ширина этажа")
+    parser.add_argument('--height', type=int, default=24, help="высота этажа")
+    parser.add_argument('--floors', type=int, default=3, help="количество этажей")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="сгенерировать все этажи сразу в пуле из стольких процессов")
+    parser.add_argument('--seed', type=seed_arg, default=None,
+                        help="зерно игры: одинаковое зерно дает одинаковое подземелье")
+    parser.add_argument('--save', default='savegame.dat', help="куда сохранять игру при выходе по 'q'")
+    parser.add_argument('--load', default=None, help="продолжить игру из сохранения")
+    parser.add_argument('--realtime', action='store_true',
+                        help="враги ходят сами с частотой --tick-rate, не дожидаясь хода игрока")
+    parser.add_argument('--tick-rate', type=float, default=15.0, help="тактов симуляции в секунду (--realtime)")
+    parser.add_argument('--fps', type=float, default=30.0, help="наибольшая частота кадров (--realtime)")
+    parser.add_argument('--profile', nargs='?', const='profile.json', default=None,
+                        help="замерять фазы хода и задержку ввода, сводку записать в файл (profile.json)")
+    parser.add_argument('--telemetry', nargs='?', const='telemetry.jsonl', default=None,
+                        help="дописывать события игры в журнал (telemetry.jsonl), см. telemetry.py")
+    parser.add_argument('--record', default='last_run.rec',
+                        help="куда записать ввод игры для replay.py (пустая строка - не записывать)")
+    args = parser.parse_args()
+
+    # Терминал переводится в режим посимвольного ввода один раз на всю игру
+    with InputSession() as keyboard:
+        if args.workers and args.workers > 1 and not args.load:
+            # Пул процессов --workers создается из главного потока, пока других потоков нет:
+            # fork многопоточного процесса может зависнуть
+            session = create_session(args)
+            show_title_screen()
+            transition_to_game()
+        else:
+            # Подземелье генерируется в фоновом потоке, пока игрок смотрит заставку:
+            # заставка почти все время ждет клавишу или спит, так что поток успевает поработать
+            with ThreadPoolExecutor(max_workers=1) as background:
+                pending_session = background.submit(create_session, args)
+                show_title_screen()
+                transition_to_game()
+                session = pending_session.result()
+
+        frame_renderer().watch_resize(keyboard.wake)
+        profiler = None
+        if args.profile:
+            profiler = Profiler()
+            profiler.install(session, frame_renderer(), keyboard)
+        telemetry = None
+        if args.telemetry:
+            telemetry = TelemetryLog(args.telemetry, session.seed)
+            session.attach_telemetry(telemetry)
+        recorder = None
+        if args.record:
+            save_data = None
+            if args.load:
+                with open(args.load, 'rb') as f:
+                    save_data = f.read()
+            recorder = Recorder(args.record, session, args.workers, save_data, args.realtime)
+            recorder.attach(session)
+
+        realtime_stats = None
+        if args.realtime:
+            realtime_stats = run_realtime(session, keyboard,
+                                          lambda: render_game(session.player, session.dungeon,
+                                                              session.enemies, session.items,
+                                                              session.message),
+                                          lambda events: handle_events(session, events, args.save),
+                                          args.tick_rate, args.fps)
+        else:
+            while session.running:
+                render_game(session.player, session.dungeon, session.enemies, session.items, session.message)
+                key = keyboard.get_key()
+                if key is None and keyboard.closed:
+                    break  # ввод закончился - ждать больше нечего
+                if key == RESIZE:
+                    continue  # терминал изменил размер - сразу перерисовать кадр, хода нет
+                handle_events(session, session.step(key), args.save)
+        session.close()
+        if recorder is not None:
+            recorder.close(session)
+        if telemetry is not None:
+            telemetry.close(session.turn)
+
+    # Сводки выводятся после финального экрана (display_game_over / display_victory_screen)
+    if realtime_stats is not None:
+        summary = realtime_stats.summary()
+        print(f"Такты: {summary['ticks']}, в среднем {summary['tick_mean_ms']:.2f} мс, "
+              f"p95 {summary['tick_p95_ms']:.2f} мс из {summary['tick_budget_ms']:.1f} мс "
+              f"(сверх бюджета: {summary['ticks_over_budget']}, пропущено: {summary['skipped_ticks']}); "
+              f"кадры: {summary['frames']}, p95 {summary['frame_p95_ms']:.2f} мс из "
+              f"{summary['frame_budget_ms']:.1f} мс (сверх бюджета: {summary['frames_over_budget']})")
+        if profiler is not None:
+            profiler.extra['realtime'] = summary
+    if profiler is not None:
+        profiler.dump(args.profile)
@@ -1,7 +1,12 @@
 import random
-from typing import List, Tuple, Set
-from colorama import Fore, Back, Style
+from collections import deque
+import concurrent.futures
+from typing import Dict, List, Optional, Tuple, Set
 from entities import Item, Key
+from fov import compute_fov
+from glyphs import GLYPHS, TILE_VISIBLE
+from spatial_index import RoomIndex
+from rng import derive_seed, new_seed
 
 
 """map_generator.py - Генерация карты
@@ -21,19 +26,76 @@ class Tile:
         self.explored = False
 
     def __str__(self) -> str:
-        if self.tile_type == Tile.EMPTY:
-            return " "
-        elif self.tile_type == Tile.FLOOR:
-            return "\033[47m \033[0m"
-        elif self.tile_type == Tile.WALL:
-            return Fore.LIGHTBLACK_EX + Back.BLACK + "▒" + Style.RESET_ALL
-        elif self.tile_type == Tile.CORRIDOR:
-            return "\033[47m \033[0m"
-        elif self.tile_type == Tile.STAIRS_UP:
-            return Style.BRIGHT + "\033[32;47m⬆\033[0m" + Style.RESET_ALL
-        elif self.tile_type == Tile.STAIRS_DOWN:
-            return Style.BRIGHT + "\033[32;47m⬇\033[0m" + Style.RESET_ALL
-        return " "
+        return Tile.to_str(self.tile_type)
+
+    @staticmethod
+    def to_str(tile_type: int) -> str:
+        return GLYPHS[TILE_VISIBLE[tile_type]]
+
+
+# BLOCKING[tile_type] == 1 для плиток, через которые нельзя пройти (EMPTY и WALL)
+BLOCKING = bytes([1, 0, 1, 0, 0, 0])
+
+
+class TileRef:
+    # Легковесное представление одной клетки этажа для кода, который обращается к floor.tiles[x][y].
+    # Само ничего не хранит: чтение и запись идут в массивы этажа.
+    __slots__ = ('_floor', '_index')
+
+    def __init__(self, floor: 'Floor', index: int):
+        self._floor = floor
+        self._index = index
+
+    @property
+    def tile_type(self) -> int:
+        return self._floor.tile_types[self._index]
+
+    @tile_type.setter
+    def tile_type(self, value: int) -> None:
+        self._floor.tile_types[self._index] = value
+
+    @property
+    def explored(self) -> bool:
+        return bool(self._floor.explored[self._index])
+
+    @explored.setter
+    def explored(self, value: bool) -> None:
+        self._floor.explored[self._index] = 1 if value else 0
+
+    def __str__(self) -> str:
+        return Tile.to_str(self.tile_type)
+
+
+class TileGrid:
+    # Представление floor.tiles[x][y] поверх массивов этажа
+    __slots__ = ('_floor',)
+
+    def __init__(self, floor: 'Floor'):
+        self._floor = floor
+
+    def __len__(self) -> int:
+        return self._floor.width
+
+    def __getitem__(self, x: int) -> '_TileColumn':
+        if not 0 <= x < self._floor.width:
+            raise IndexError(x)
+        return _TileColumn(self._floor, x)
+
+
+class _TileColumn:
+    __slots__ = ('_floor', '_x')
+
+    def __init__(self, floor: 'Floor', x: int):
+        self._floor = floor
+        self._x = x
+
+    def __len__(self) -> int:
+        return self._floor.height
+
+    def __getitem__(self, y: int) -> TileRef:
+        if not 0 <= y < self._floor.height:
+            raise IndexError(y)
+        return TileRef(self._floor, y * self._floor.width + self._x)
 
 class Room:
     def __init__(self, x: int, y: int, width: int, height: int):
@@ -42,10 +104,8 @@ class Room:
         self.x2 = x + width
         self.y2 = y + height
         self.openings = []
-
-    @property
-    def center(self) -> Tuple[int, int]:
-        return (self.x1 + self.x2) // 2, (self.y1 + self.y2) // 2
+        # Комната не меняется после создания, поэтому центр считается один раз
+        self.center: Tuple[int, int] = ((self.x1 + self.x2) // 2, (self.y1 + self.y2) // 2)
 
     def intersects(self, other: 'Room') -> bool:
         return (self.x1 <= other.x2 and self.x2 >= other.x1 and
@@ -54,22 +114,61 @@ class Room:
 class Floor:
     # Класс Floor представляет собой отдельный этаж (уровень) подземелья.
     # Он хранит информацию о размере этажа, всех плитках (tiles), комнатах и лестницах.
+    # Плитки хранятся построчно в двух массивах байт (индекс клетки: y * width + x):
+    # - tile_types: тип плитки
+    # - explored: 1, если клетка исследована (память игрока, сохраняется между ходами)
+    # Отдельно хранится visible - индексы клеток, видимых в текущем ходу.
+    # floor.tiles[x][y] остается доступным как представление поверх этих массивов.
     
     def __init__(self, width: int, height: int):
         self.width = width
         self.height = height
-        self.tiles = [[Tile() for _ in range(height)] for _ in range(width)]
+        self.tile_types = bytearray(width * height)
+        self.explored = bytearray(width * height)
+        self.visible: Set[int] = set()
+        self.tiles = TileGrid(self)
         self.rooms: List[Room] = []
         self.stairs_up: List[Tuple[int, int]] = []
         self.stairs_down: List[Tuple[int, int]] = []
+        self.distance_map = None  # кэш карты расстояний до игрока (см. pathfinding.distance_map_to)
+
+    def to_compact(self) -> tuple:
+        # Компактное представление для передачи между процессами: размеры, сетка типов, комнаты и лестницы
+        rooms = [(room.x1, room.y1, room.x2, room.y2, room.openings) for room in self.rooms]
+        return self.width, self.height, bytes(self.tile_types), rooms, self.stairs_up, self.stairs_down
+
+    @classmethod
+    def from_compact(cls, compact: tuple) -> 'Floor':
+        width, height, tile_types, rooms, stairs_up, stairs_down = compact
+        floor = cls(width, height)
+        floor.tile_types[:] = tile_types
+        floor.stairs_up = list(stairs_up)
+        floor.stairs_down = list(stairs_down)
+        for x1, y1, x2, y2, openings in rooms:
+            room = Room(x1, y1, x2 - x1, y2 - y1)
+            room.openings = list(openings)
+            floor.rooms.append(room)
+        return floor
+
+    def tile_at(self, x: int, y: int) -> int:
+        return self.tile_types[y * self.width + x]
+
+    def set_tile(self, x: int, y: int, tile_type: int) -> None:
+        self.tile_types[y * self.width + x] = tile_type
+
+    def is_explored(self, x: int, y: int) -> bool:
+        return self.explored[y * self.width + x] == 1
+
+    def is_visible(self, x: int, y: int) -> bool:
+        return y * self.width + x in self.visible
 
     def update_fov(self, x: int, y: int, radius: int = 5) -> None:
-        for dx in range(-radius, radius + 1):
-            for dy in range(-radius, radius + 1):
-                if dx**2 + dy**2 <= radius**2:
-                    tx, ty = x + dx, y + dy
-                    if 0 <= tx < self.width and 0 <= ty < self.height:
-                        self.tiles[tx][ty].explored = True
+        # Пересчитывает видимые из (x, y) клетки (стены закрывают обзор)
+        # и добавляет их к исследованным
+        self.visible = compute_fov(self.tile_types, self.width, self.height, x, y, radius, BLOCKING)
+        explored = self.explored
+        for index in self.visible:
+            explored[index] = 1
 
     def is_blocked(self, x: int, y: int) -> bool:
         # Проверяет, заблокирована ли позиция (x, y) для перемещения.
@@ -77,7 +176,7 @@ class Floor:
         # - позиция за пределами карты
         # - в позиции находится стена (WALL) или пустота (EMPTY)
         if 0 <= x < self.width and 0 <= y < self.height:
-            return self.tiles[x][y].tile_type in (Tile.WALL, Tile.EMPTY)
+            return BLOCKING[self.tile_types[y * self.width + x]] == 1
         return True
 
     def is_valid_position(self, x: int, y: int) -> bool:
@@ -85,39 +184,96 @@ class Floor:
         # Используется для предотвращения выхода за границы карты.
         return 0 <= x < self.width and 0 <= y < self.height
 
+def _generate_floor_job(config: dict, floor_num: int) -> tuple:
+    # Выполняется в процессе пула: генерирует один этаж и возвращает его компактное представление
+    return MapGenerator(**config).generate_floor(floor_num).to_compact()
+
+
+class RoomLinks:
+    # Система непересекающихся множеств (union-find) над номерами комнат этажа:
+    # комнаты одного множества гарантированно соединены коридорами
+    
+    def __init__(self):
+        self.parent: List[int] = []
+
+    def add(self) -> int:
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            # Корнем остается меньший номер, чтобы множество комнаты 0 было легко узнать
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    def connected(self, i: int, j: int) -> bool:
+        return self.find(i) == self.find(j)
+
+
 class MapGenerator:
     # Класс MapGenerator отвечает за процедурную генерацию многоуровневого подземелья.
     # Он создает этажи с комнатами, коридорами и лестницами между уровнями.
     
     def __init__(self, width: int = 80, height: int = 40, num_floors: int = 3,
-                 max_rooms: int = 15, min_room_size: int = 5, max_room_size: int = 10):
+                 max_rooms: int = 15, min_room_size: int = 5, max_room_size: int = 10,
+                 seed: Optional[int] = None):
         # Инициализация генератора карты с параметрами:
         # - width, height: размеры каждого этажа
         # - num_floors: количество уровней подземелья
         # - max_rooms: максимальное число комнат на этаж
         # - min/max_room_size: минимальный/максимальный размер комнат
+        # - seed: зерно карты; каждый этаж генерируется своим генератором с зерном derive_seed(seed, номер)
         self.width = width
         self.height = height
         self.num_floors = num_floors
         self.max_rooms = max_rooms
         self.min_room_size = min_room_size
         self.max_room_size = max_room_size
+        self.seed = seed if seed is not None else new_seed()
+        self.rng = random.Random(self.seed)
         self.floors: List[Floor] = []
 
-    def generate_map(self) -> List[Floor]:
-        # Основной метод генерации карты, создающий все этажи подземелья
-        # Для каждого этажа вызывает _generate_floor(), затем добавляет лестницы между этажами
-        self.floors = []
-        for floor_num in range(self.num_floors):
-            floor = self._generate_floor()
-            if floor.rooms:
-                start_room = floor.rooms[0]
-                start_x, start_y = start_room.center
-                floor.update_fov(start_x, start_y)
-            self.floors.append(floor)
-
-        for floor_num in range(self.num_floors - 1):
-            self._add_stairs(floor_num, floor_num + 1)
+    def config(self) -> dict:
+        # Параметры конструктора, по которым в другом процессе можно создать такой же генератор
+        return dict(width=self.width, height=self.height, num_floors=self.num_floors,
+                    max_rooms=self.max_rooms, min_room_size=self.min_room_size,
+                    max_room_size=self.max_room_size, seed=self.seed)
+
+    def generate_floor(self, floor_num: int) -> Floor:
+        # Генерирует этаж floor_num вместе с его лестницами; результат зависит только от seed
+        # и номера этажа, поэтому этажи можно строить в любом порядке и в разных процессах
+        self.rng = random.Random(derive_seed(self.seed, "floor", floor_num))
+        floor = self._generate_floor()
+        self._add_stairs(floor, floor_num)
+        return floor
+
+    def prepare_floor(self, floor: Floor) -> Floor:
+        # Открывает окрестность стартовой комнаты этажа
+        if floor.rooms:
+            start_x, start_y = floor.rooms[0].center
+            floor.update_fov(start_x, start_y)
+        return floor
+
+    def generate_map(self, workers: Optional[int] = None) -> List[Floor]:
+        # Основной метод генерации карты, создающий все этажи подземелья сразу
+        # (для генерации по мере надобности см. dungeon.Dungeon).
+        # При workers > 1 этажи генерируются параллельно в пуле процессов и возвращаются
+        # компактными сетками; результат тот же, что и без пула.
+        if workers and workers > 1 and self.num_floors > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                compact = list(pool.map(_generate_floor_job, [self.config()] * self.num_floors,
+                                        range(self.num_floors)))
+            floors = [Floor.from_compact(c) for c in compact]
+        else:
+            floors = [self.generate_floor(floor_num) for floor_num in range(self.num_floors)]
+        self.floors = [self.prepare_floor(floor) for floor in floors]
         return self.floors
 
     def _generate_floor(self) -> Floor:
@@ -125,53 +281,93 @@ class MapGenerator:
         # 1. Создает объект Floor
         # 2. Пытается разместить случайные комнаты (до max_rooms)
         # 3. При размещении проверяет, не пересекается ли новая комната с существующими
-        # 4. Соединяет каждую новую комнату с ближайшей из уже соединенных
-        # 5. В конце проверяет связность всех комнат
+        #    и не перерезает ли она уже проложенные коридоры
+        # 4. Соединяет каждую новую комнату с ближайшей из уже соединенных,
+        #    отмечая связность в union-find (RoomLinks)
+        # 5. В конце доводит связность до конца и проверяет ее одной заливкой
         floor = Floor(self.width, self.height)
         safe_margin = 3
-        connected_rooms = []
+        room_index = RoomIndex(self.max_room_size + 1)
+        links = RoomLinks()
+        room_ids: Dict[Room, int] = {}
+        opening_rooms: Dict[Tuple[int, int], int] = {}
 
         for _ in range(self.max_rooms):
-            w = random.randint(self.min_room_size, self.max_room_size)
-            h = random.randint(self.min_room_size, self.max_room_size)
-            x = random.randint(safe_margin, self.width - w - safe_margin)
-            y = random.randint(safe_margin, self.height - h - safe_margin)
+            w = self.rng.randint(self.min_room_size, self.max_room_size)
+            h = self.rng.randint(self.min_room_size, self.max_room_size)
+            x = self.rng.randint(safe_margin, self.width - w - safe_margin)
+            y = self.rng.randint(safe_margin, self.height - h - safe_margin)
 
             new_room = Room(x, y, w, h)
-            if any(new_room.intersects(other_room) for other_room in floor.rooms):
+            if room_index.intersects(new_room) or self._covers_corridor(floor, new_room):
                 continue
 
             self._create_room(floor, new_room)
             floor.rooms.append(new_room)
+            room_ids[new_room] = links.add()
 
-            if connected_rooms:
-                closest_room = min(connected_rooms, key=lambda r: self._calculate_distance(new_room, r))
-                self._connect_rooms(floor, new_room, closest_room)
-            else:
-                connected_rooms.append(new_room)
+            # Все уже размещенные комнаты соединены между собой, поэтому ближайшая из них подходит
+            closest_room = room_index.nearest(*new_room.center)
+            if closest_room is not None:
+                self._link_rooms(floor, new_room, closest_room, links, room_ids, opening_rooms)
+            room_index.add(new_room)
 
-        self._ensure_connectivity(floor)
+        self._ensure_connectivity(floor, room_index, links, room_ids, opening_rooms)
         return floor
 
+    def _covers_corridor(self, floor: Floor, room: Room) -> bool:
+        # Проверяет, лежит ли в прямоугольнике комнаты (вместе со стенами) коридор:
+        # стены новой комнаты могли бы перерезать его и разорвать связность
+        width = floor.width
+        types = floor.tile_types
+        for y in range(room.y1, room.y2 + 1):
+            row = y * width
+            if Tile.CORRIDOR in types[row + room.x1:row + room.x2 + 1]:
+                return True
+        return False
+
+    def _link_rooms(self, floor: Floor, room1: Room, room2: Room, links: RoomLinks,
+                    room_ids: Dict[Room, int], opening_rooms: Dict[Tuple[int, int], int]) -> None:
+        # Прокладывает коридор между комнатами и обновляет union-find:
+        # - комнаты коридора объединяются
+        # - если коридор прошел через выход другой комнаты, она тоже объединяется
+        id1, id2 = room_ids[room1], room_ids[room2]
+        carved = self._connect_rooms(floor, room1, room2)
+        if not carved:
+            return
+        links.union(id1, id2)
+        for cell in carved:
+            other = opening_rooms.get(cell)
+            if other is not None:
+                links.union(id1, other)
+        opening_rooms[room1.openings[-1]] = id1
+        opening_rooms[room2.openings[-1]] = id2
+
     def _create_room(self, floor: Floor, room: Room) -> None:
         # Создает комнату на карте, устанавливая соответствующие типы плиток:
         # - Внутренность комнаты: плитки типа FLOOR
         # - Периметр комнаты: плитки типа WALL
-        for x in range(room.x1 + 1, room.x2):
-            for y in range(room.y1 + 1, room.y2):
-                floor.tiles[x][y].tile_type = Tile.FLOOR
-        for x in range(room.x1, room.x2 + 1):
-            floor.tiles[x][room.y1].tile_type = Tile.WALL
-            floor.tiles[x][room.y2].tile_type = Tile.WALL
+        # Строки комнаты заполняются срезами массива целиком
+        width = floor.width
+        types = floor.tile_types
+        inner = bytes([Tile.FLOOR]) * (room.x2 - room.x1 - 1)
+        for y in range(room.y1 + 1, room.y2):
+            row = y * width
+            types[row + room.x1 + 1:row + room.x2] = inner
+        wall = bytes([Tile.WALL]) * (room.x2 - room.x1 + 1)
+        for y in (room.y1, room.y2):
+            row = y * width
+            types[row + room.x1:row + room.x2 + 1] = wall
         for y in range(room.y1, room.y2 + 1):
-            floor.tiles[room.x1][y].tile_type = Tile.WALL
-            floor.tiles[room.x2][y].tile_type = Tile.WALL
+            types[y * width + room.x1] = Tile.WALL
+            types[y * width + room.x2] = Tile.WALL
 
-    def _connect_rooms(self, floor: Floor, room1: Room, room2: Room) -> None:
+    def _connect_rooms(self, floor: Floor, room1: Room, room2: Room) -> List[Tuple[int, int]]:
         # Соединяет две комнаты коридором:
         # 1. Находит подходящие точки выхода из каждой комнаты
         # 2. Создает L-образный коридор между этими точками
         # 3. Добавляет выходы в список отверстий каждой комнаты
+        # Возвращает клетки, ставшие коридором
         x1, y1 = room1.center
         x2, y2 = room2.center
 
@@ -180,23 +376,25 @@ class MapGenerator:
         opening2 = self._find_valid_opening(floor, room2, x1, y1)
 
         if not (opening1 and opening2):
-            return
+            return []
 
         ox1, oy1 = opening1
         ox2, oy2 = opening2
 
-        floor.tiles[ox1][oy1].tile_type = Tile.CORRIDOR
-        floor.tiles[ox2][oy2].tile_type = Tile.CORRIDOR
+        floor.set_tile(ox1, oy1, Tile.CORRIDOR)
+        floor.set_tile(ox2, oy2, Tile.CORRIDOR)
         room1.openings.append((ox1, oy1))
         room2.openings.append((ox2, oy2))
 
         # Create L-shaped corridor
-        if random.random() < 0.5:
-            self._create_horizontal_tunnel(floor, ox1, ox2, oy1)
-            self._create_vertical_tunnel(floor, oy1, oy2, ox2)
+        carved = [opening1, opening2]
+        if self.rng.random() < 0.5:
+            carved += self._create_horizontal_tunnel(floor, ox1, ox2, oy1)
+            carved += self._create_vertical_tunnel(floor, oy1, oy2, ox2)
         else:
-            self._create_vertical_tunnel(floor, oy1, oy2, ox1)
-            self._create_horizontal_tunnel(floor, ox1, ox2, oy2)
+            carved += self._create_vertical_tunnel(floor, oy1, oy2, ox1)
+            carved += self._create_horizontal_tunnel(floor, ox1, ox2, oy2)
+        return carved
 
     def _find_valid_opening(self, floor: Floor, room: Room, target_x: int, target_y: int) -> Tuple[int, int]:
         # Ищет лучшую точку для прокладки коридора из комнаты:
@@ -209,14 +407,14 @@ class MapGenerator:
         # Check all walls for valid openings
         for x in range(room.x1 + 1, room.x2):
             for y in (room.y1, room.y2):
-                if floor.is_valid_position(x, y) and floor.tiles[x][y].tile_type == Tile.WALL:
+                if floor.is_valid_position(x, y) and floor.tile_at(x, y) == Tile.WALL:
                     dist = ((x - target_x) ** 2 + (y - target_y) ** 2) ** 0.5
                     if dist < min_dist:
                         min_dist = dist
                         best_opening = (x, y)
         for y in range(room.y1 + 1, room.y2):
             for x in (room.x1, room.x2):
-                if floor.is_valid_position(x, y) and floor.tiles[x][y].tile_type == Tile.WALL:
+                if floor.is_valid_position(x, y) and floor.tile_at(x, y) == Tile.WALL:
                     dist = ((x - target_x) ** 2 + (y - target_y) ** 2) ** 0.5
                     if dist < min_dist:
                         min_dist = dist
@@ -224,70 +422,110 @@ class MapGenerator:
 
         return best_opening or room.center
 
-    def _create_horizontal_tunnel(self, floor: Floor, x1: int, x2: int, y: int) -> None:
-        # Создает горизонтальный коридор от x1 до x2 на высоте y
+    def _create_horizontal_tunnel(self, floor: Floor, x1: int, x2: int, y: int) -> List[Tuple[int, int]]:
+        # Создает горизонтальный коридор от x1 до x2 на высоте y, возвращает клетки коридора
+        carved = []
         if not (0 <= y < floor.height):
-            return
+            return carved
         for x in range(min(x1, x2), max(x1, x2) + 1):
-            if floor.is_valid_position(x, y) and floor.tiles[x][y].tile_type != Tile.FLOOR:
-                floor.tiles[x][y].tile_type = Tile.CORRIDOR
+            if floor.is_valid_position(x, y) and floor.tile_at(x, y) != Tile.FLOOR:
+                floor.set_tile(x, y, Tile.CORRIDOR)
+                carved.append((x, y))
             self._add_tunnel_walls(floor, x, y)
+        return carved
 
-    def _create_vertical_tunnel(self, floor: Floor, y1: int, y2: int, x: int) -> None:
-        # Создает вертикальный коридор от y1 до y2 на позиции x
+    def _create_vertical_tunnel(self, floor: Floor, y1: int, y2: int, x: int) -> List[Tuple[int, int]]:
+        # Создает вертикальный коридор от y1 до y2 на позиции x, возвращает клетки коридора
+        carved = []
         if not (0 <= x < floor.width):
-            return
+            return carved
         for y in range(min(y1, y2), max(y1, y2) + 1):
-            if floor.is_valid_position(x, y) and floor.tiles[x][y].tile_type != Tile.FLOOR:
-                floor.tiles[x][y].tile_type = Tile.CORRIDOR
+            if floor.is_valid_position(x, y) and floor.tile_at(x, y) != Tile.FLOOR:
+                floor.set_tile(x, y, Tile.CORRIDOR)
+                carved.append((x, y))
             self._add_tunnel_walls(floor, x, y)
+        return carved
 
     def _add_tunnel_walls(self, floor: Floor, x: int, y: int) -> None:
         # Добавляет стены вокруг коридора, чтобы коридор был окружен стенами
         for dx, dy in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
             tx, ty = x + dx, y + dy
             if (floor.is_valid_position(tx, ty) and
-                floor.tiles[tx][ty].tile_type == Tile.EMPTY):
-                floor.tiles[tx][ty].tile_type = Tile.WALL
+                floor.tile_at(tx, ty) == Tile.EMPTY):
+                floor.set_tile(tx, ty, Tile.WALL)
 
-    def _ensure_connectivity(self, floor: Floor) -> None:
+    def _ensure_connectivity(self, floor: Floor, room_index: RoomIndex, links: RoomLinks,
+                             room_ids: Dict[Room, int], opening_rooms: Dict[Tuple[int, int], int]) -> None:
         # Проверяет и обеспечивает, чтобы все комнаты на этаже были соединены:
-        # 1. Находит все уже соединенные комнаты
-        # 2. Для каждой несоединенной комнаты находит ближайшую соединенную
-        # 3. Создает коридор между ними
+        # 1. По union-find находит комнаты, не связанные с комнатой 0
+        # 2. Соединяет каждую из них с ближайшей связанной
+        # 3. Одной заливкой проверяет, что все проходимые клетки достижимы
         if not floor.rooms:
             return
 
-        connected = self._find_connected_rooms(floor, 0)
-        for i, room in enumerate(floor.rooms):
-            if i not in connected:
-                closest_idx = min(connected, key=lambda j: self._calculate_distance(room, floor.rooms[j]))
-                self._connect_rooms(floor, room, floor.rooms[closest_idx])
-                connected.update(self._find_connected_rooms(floor, i))
-
-    def _find_connected_rooms(self, floor: Floor, start_idx: int) -> Set[int]:
-        # Находит все комнаты, соединенные с комнатой start_idx:
-        # Использует поиск в глубину по графу комнат и коридоров
-        if not floor.rooms:
-            return set()
-
-        visited = set()
-        stack = [(start_idx, opening) for opening in floor.rooms[start_idx].openings]
-        while stack:
-            room_idx, (x, y) = stack.pop()
-            if room_idx in visited:
+        for room in floor.rooms:
+            if not links.connected(room_ids[room], 0):
+                closest_room = room_index.nearest(*room.center, accept=lambda r: links.connected(room_ids[r], 0))
+                self._link_rooms(floor, room, closest_room, links, room_ids, opening_rooms)
+        self._flood_check(floor, room_index)
+
+    def _flood_check(self, floor: Floor, room_index: RoomIndex) -> None:
+        # Заливка от центра первой комнаты по проходимым клеткам.
+        # Комнаты, до которых заливка не дошла, соединяются с ближайшей достигнутой, и заливка
+        # продолжается только с клеток нового коридора, соседних с уже достигнутыми, - так
+        # комната считается достигнутой, лишь если путь до нее действительно есть. Если обычный
+        # коридор не дошел, прокладывается прямой коридор между центрами комнат.
+        # Оставшиеся недостижимые клетки вне комнат становятся стенами.
+        width = floor.width
+        reached = bytearray(width * floor.height)
+
+        reached_count = 0
+
+        def flood(x: int, y: int) -> None:
+            nonlocal reached_count
+            reached[y * width + x] = 1
+            reached_count += 1
+            queue = deque([(x, y)])
+            while queue:
+                x, y = queue.popleft()
+                for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+                    nx, ny = x + dx, y + dy
+                    if not floor.is_blocked(nx, ny) and not reached[ny * width + nx]:
+                        reached[ny * width + nx] = 1
+                        reached_count += 1
+                        queue.append((nx, ny))
+
+        def extend(cells: List[Tuple[int, int]]) -> None:
+            # Продолжает заливку с проходимых клеток, соседних с уже достигнутыми
+            for x, y in cells:
+                if floor.is_blocked(x, y) or reached[y * width + x]:
+                    continue
+                for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+                    nx, ny = x + dx, y + dy
+                    if floor.is_valid_position(nx, ny) and reached[ny * width + nx]:
+                        flood(x, y)
+                        break
+
+        flood(*floor.rooms[0].center)
+        for room in floor.rooms:
+            x, y = room.center
+            if reached[y * width + x]:
                 continue
-            visited.add(room_idx)
-
-            # Check adjacent tiles for connected corridors
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                if (floor.is_valid_position(nx, ny) and
-                    floor.tiles[nx][ny].tile_type == Tile.CORRIDOR):
-                    for i, other_room in enumerate(floor.rooms):
-                        if i != room_idx and (nx, ny) in other_room.openings:
-                            stack.append((i, (nx, ny)))
-        return visited
+            closest_room = room_index.nearest(x, y, accept=lambda r: reached[r.center[1] * width + r.center[0]])
+            extend(self._connect_rooms(floor, room, closest_room))
+            if not reached[y * width + x]:
+                cx, cy = closest_room.center
+                extend(self._create_horizontal_tunnel(floor, x, cx, y) +
+                       self._create_vertical_tunnel(floor, y, cy, cx))
+            if not reached[y * width + x]:
+                raise RuntimeError(f"Комната в ({x}, {y}) осталась недостижимой")
+
+        types = floor.tile_types
+        walkable_count = sum(types.count(t) for t in range(len(BLOCKING)) if not BLOCKING[t])
+        if walkable_count != reached_count:
+            for index in range(len(types)):
+                if not reached[index] and not BLOCKING[types[index]]:
+                    types[index] = Tile.WALL
 
     def _calculate_distance(self, room1: Room, room2: Room) -> float:
         # Вычисляет евклидово расстояние между центрами двух комнат
@@ -295,27 +533,30 @@ class MapGenerator:
         x2, y2 = room2.center
         return ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
 
-    def _add_stairs(self, floor_num: int, next_floor_num: int) -> None:
-        # Добавляет лестницы между этажами:
-        # 1. Случайно выбирает комнаты на обоих этажах
-        # 2. Размещает лестницу вверх в центре комнаты на нижнем этаже
-        # 3. Размещает лестницу вниз в центре комнаты на верхнем этаже
-        current_floor = self.floors[floor_num]
-        next_floor = self.floors[next_floor_num]
-
-        room_up = random.choice(current_floor.rooms)
-        x_up, y_up = room_up.center
-        x_up = max(1, min(current_floor.width - 2, x_up))
-        y_up = max(1, min(current_floor.height - 2, y_up))
-        current_floor.tiles[x_up][y_up].tile_type = Tile.STAIRS_UP
-        current_floor.stairs_up.append((x_up, y_up))
-
-        room_down = random.choice(next_floor.rooms)
-        x_down, y_down = room_down.center
-        x_down = max(1, min(next_floor.width - 2, x_down))
-        y_down = max(1, min(next_floor.height - 2, y_down))
-        next_floor.tiles[x_down][y_down].tile_type = Tile.STAIRS_DOWN
-        next_floor.stairs_down.append((x_down, y_down))
+    def _add_stairs(self, floor: Floor, floor_num: int) -> None:
+        # Добавляет лестницы этажа, не заглядывая на соседние этажи:
+        # 1. Лестница вниз (на этаж floor_num - 1) в центре случайной комнаты
+        # 2. Лестница вверх (на этаж floor_num + 1) в центре другой случайной комнаты
+        # Player.use_stairs переводит с лестницы вверх этажа n на лестницу вниз этажа n + 1
+        rooms = floor.rooms
+        room_down = None
+        if floor_num > 0:
+            room_down = self.rng.choice(rooms)
+            x_down, y_down = room_down.center
+            x_down = max(1, min(floor.width - 2, x_down))
+            y_down = max(1, min(floor.height - 2, y_down))
+            floor.set_tile(x_down, y_down, Tile.STAIRS_DOWN)
+            floor.stairs_down.append((x_down, y_down))
+
+        if floor_num < self.num_floors - 1:
+            # Лестница вверх не должна затереть лестницу вниз, если есть из чего выбрать
+            candidates = [room for room in rooms if room is not room_down] or rooms
+            room_up = self.rng.choice(candidates)
+            x_up, y_up = room_up.center
+            x_up = max(1, min(floor.width - 2, x_up))
+            y_up = max(1, min(floor.height - 2, y_up))
+            floor.set_tile(x_up, y_up, Tile.STAIRS_UP)
+            floor.stairs_up.append((x_up, y_up))
 
     def print_map(self, floor_num: int, player=None) -> None:
         # Отображает карту этажа в консоли:
@@ -328,18 +569,17 @@ class MapGenerator:
         for y in range(floor.height):
             row = ""
             for x in range(floor.width):
-                tile = floor.tiles[x][y]
                 if player and player.current_floor == floor_num and player.x == x and player.y == y:
                     row += "@"
                 else:
-                    row += str(tile) if tile.explored else " "
+                    row += Tile.to_str(floor.tile_at(x, y)) if floor.is_explored(x, y) else " "
             print(row)
     
-    def generate_random_key(self, dungeon: List[Floor]) -> Tuple[Item, int, int, int]:
-        random_key_floor = random.randint(0, len(dungeon) - 1)
-        room = random.choice(dungeon[random_key_floor].rooms)
-        key_x = random.randint(room.x1 + 1, room.x2 - 1)
-        key_y = random.randint(room.y1 + 1, room.y2 - 1)
+    def generate_random_key(self, dungeon: List[Floor], rng=random) -> Tuple[Item, int, int, int]:
+        random_key_floor = rng.randint(0, len(dungeon) - 1)
+        room = rng.choice(dungeon[random_key_floor].rooms)
+        key_x = rng.randint(room.x1 + 1, room.x2 - 1)
+        key_y = rng.randint(room.y1 + 1, room.y2 - 1)
         if 0 <= key_x < dungeon[random_key_floor].width and 0 <= key_y < dungeon[random_key_floor].height:
             return Key(3), key_x, key_y, random_key_floor
         return None
\ No newline at end of file
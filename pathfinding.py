@@ -0,0 +1,61 @@
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+
+"""pathfinding.py - поиск пути для преследующих врагов
+DistanceMap - карта расстояний до цели (поиск в ширину по проходимым клеткам этажа)
+distance_map_to() - карта расстояний до игрока, общая для всех врагов этажа"""
+
+
+STEPS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+
+class DistanceMap:
+    """Расстояния (в шагах) от каждой достижимой клетки до цели, не дальше max_distance."""
+
+    def __init__(self, floor, target_x: int, target_y: int, max_distance: int = 16):
+        self.target = (target_x, target_y)
+        self.width = floor.width
+        self.max_distance = max_distance
+        self.distances: Dict[int, int] = {target_y * floor.width + target_x: 0}
+
+        width = floor.width
+        distances = self.distances
+        queue = deque([(target_x, target_y, 0)])
+        while queue:
+            x, y, distance = queue.popleft()
+            if distance >= max_distance:
+                continue
+            for dx, dy in STEPS:
+                nx, ny = x + dx, y + dy
+                if floor.is_blocked(nx, ny):
+                    continue
+                index = ny * width + nx
+                if index in distances:
+                    continue
+                distances[index] = distance + 1
+                queue.append((nx, ny, distance + 1))
+
+    def distance(self, x: int, y: int) -> Optional[int]:
+        """Расстояние от (x, y) до цели или None, если цель дальше max_distance."""
+        return self.distances.get(y * self.width + x)
+
+    def step_from(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        """Шаг (dx, dy) к соседней клетке, которая ближе к цели, или None."""
+        best = self.distances.get(y * self.width + x, self.max_distance + 1)
+        best_step = None
+        for dx, dy in STEPS:
+            distance = self.distances.get((y + dy) * self.width + x + dx)
+            if distance is not None and distance < best:
+                best = distance
+                best_step = (dx, dy)
+        return best_step
+
+
+def distance_map_to(floor, x: int, y: int) -> DistanceMap:
+    """Возвращает карту расстояний до (x, y), пересчитывая ее только при смене цели."""
+    cached = floor.distance_map
+    if cached is None or cached.target != (x, y):
+        cached = DistanceMap(floor, x, y)
+        floor.distance_map = cached
+    return cached
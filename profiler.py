@@ -0,0 +1,140 @@
+import json
+import time
+from array import array
+from typing import Callable, Dict, List, Optional
+from game_session import GameSession
+from input_handler import InputSession, RESIZE
+from renderer import FrameRenderer
+
+
+"""profiler.py - замеры времени хода по фазам (включается флагом --profile)
+Profiler - оборачивает методы сессии, отрисовщика и ввода, копит длительности фаз,
+задержку от нажатия клавиши до кадра и число байтов каждого кадра; summary() и dump() -
+процентили p50/p95/p99 и сводка в JSON. Пока Profiler не установлен, игра не платит ничего"""
+
+
+# Фаза -> (объект, метод), см. Profiler.install
+PHASES = (
+    ('step', 'session', 'step'),              # весь ход: действие игрока и ход врагов
+    ('player_action', 'session', '_act'),     # handle_player_action
+    ('fov', 'session', '_update_fov'),        # Floor.update_fov и предзагрузка этажей
+    ('enemies', 'session', '_run_enemies'),   # планировщик и take_turn бодрствующих врагов
+    ('render', 'renderer', 'render'),         # сборка и вывод кадра
+    ('input_wait', 'keyboard', 'get_key'),    # ожидание клавиши
+)
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Значение отсортированного списка на доле fraction (0..1); 0 для пустого."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _describe(values, scale: float = 1000.0) -> Dict[str, float]:
+    # Сводка по длительностям в секундах (по умолчанию - в миллисекундах)
+    ordered = sorted(values)
+    return {
+        'count': len(ordered),
+        'total': sum(ordered) * scale,
+        'mean': sum(ordered) / len(ordered) * scale if ordered else 0.0,
+        'p50': percentile(ordered, 0.50) * scale,
+        'p95': percentile(ordered, 0.95) * scale,
+        'p99': percentile(ordered, 0.99) * scale,
+        'max': ordered[-1] * scale if ordered else 0.0,
+    }
+
+
+class Profiler:
+    """Счетчики одной игры.
+
+    install() подменяет методы конкретных объектов (атрибутами экземпляра) обертками с
+    таймером; классы не меняются, поэтому без --profile лишних вызовов нет вовсе.
+    Задержка клавиша -> кадр считается от момента, когда клавиша получена из ввода,
+    до конца ближайшей после нее отрисовки."""
+
+    def __init__(self):
+        self.phases: Dict[str, array] = {name: array('d') for name, _, _ in PHASES}
+        self.latencies = array('d')
+        self.frame_bytes = array('L')
+        self.extra: Dict[str, dict] = {}  # другие сводки для JSON (например, такты --realtime)
+        self._key_time: Optional[float] = None
+        self._frame_size = 0
+
+    def install(self, session: GameSession, renderer: FrameRenderer,
+                keyboard: Optional[InputSession] = None) -> None:
+        targets = {'session': session, 'renderer': renderer, 'keyboard': keyboard}
+        for phase, target, method in PHASES:
+            obj = targets[target]
+            if obj is not None:
+                setattr(obj, method, self._timed(self.phases[phase], getattr(obj, method)))
+
+        # Клавиша получена: get_key вернул ее (пошаговый режим) или пришли байты (реальное время)
+        if keyboard is not None:
+            get_key = keyboard.get_key
+
+            def stamped_get_key(*args, **kwargs):
+                key = get_key(*args, **kwargs)
+                if key is not None and key != RESIZE and self._key_time is None:
+                    self._key_time = time.perf_counter()
+                return key
+            keyboard.get_key = stamped_get_key
+
+            read_available = keyboard.read_available
+
+            def stamped_read_available():
+                read_available()
+                if keyboard.keys and self._key_time is None:
+                    self._key_time = time.perf_counter()
+            keyboard.read_available = stamped_read_available
+
+        write = renderer._write
+
+        def counted_write(text: str) -> None:
+            self._frame_size += len(text.encode('utf-8'))
+            write(text)
+        renderer._write = counted_write
+
+        render = renderer.render
+
+        def finished_render(*args, **kwargs):
+            render(*args, **kwargs)
+            self.frame_bytes.append(self._frame_size)
+            self._frame_size = 0
+            if self._key_time is not None:
+                self.latencies.append(time.perf_counter() - self._key_time)
+                self._key_time = None
+        renderer.render = finished_render
+
+    @staticmethod
+    def _timed(times: array, func: Callable) -> Callable:
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                times.append(perf_counter() - start)
+        return timed
+
+    def summary(self) -> dict:
+        """Сводка: фазы и задержка в миллисекундах, байты кадров."""
+        frames = sorted(self.frame_bytes)
+        return {
+            'phases_ms': {name: _describe(times) for name, times in self.phases.items()},
+            'key_to_frame_ms': _describe(self.latencies),
+            'frame_bytes': {
+                'frames': len(frames),
+                'total': sum(frames),
+                'mean': sum(frames) / len(frames) if frames else 0.0,
+                'p50': percentile(frames, 0.50),
+                'p95': percentile(frames, 0.95),
+                'max': frames[-1] if frames else 0,
+            },
+            **self.extra,
+        }
+
+    def dump(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,58 @@
+from typing import Dict, NamedTuple, Optional
+import content
+import glyphs
+
+
+"""prototypes.py - неизменяемые прототипы предметов и врагов
+ItemPrototype, EnemyPrototype - общие для всех экземпляров свойства (имя, глиф, урон и т.п.)
+item_prototype(), enemy_prototype() - реестры прототипов по описаниям из content.json;
+каждый прототип создается один раз и дальше раздается по ссылке"""
+
+
+class ItemPrototype(NamedTuple):
+    kind: str           # 'weapon', 'food', 'key' или 'item'
+    name: str
+    glyph: int
+    color: str
+    damage: int = 0     # для оружия
+    nutrition: int = 0  # для еды
+
+
+class EnemyPrototype(NamedTuple):
+    kind: str                      # 'hostile' или 'neutral'
+    name: str
+    glyph: int
+    hp: int
+    defense: int
+    power: int
+    view_range: int = 6
+    weapon: Optional[str] = None   # id прототипа оружия
+    has_key: bool = False
+    has_item: bool = False
+    has_riddle: bool = False
+
+
+_items: Dict[str, ItemPrototype] = {}
+_enemies: Dict[str, EnemyPrototype] = {}
+
+
+def item_prototype(item_id: str) -> ItemPrototype:
+    prototype = _items.get(item_id)
+    if prototype is None:
+        definition = content.item_definition(item_id)
+        prototype = _items[item_id] = ItemPrototype(
+            definition['kind'], definition['name'], getattr(glyphs, definition['glyph']), definition['color'],
+            definition.get('damage', 0), definition.get('nutrition', 0))
+    return prototype
+
+
+def enemy_prototype(enemy_id: str) -> EnemyPrototype:
+    prototype = _enemies.get(enemy_id)
+    if prototype is None:
+        definition = content.enemy_definition(enemy_id)
+        prototype = _enemies[enemy_id] = EnemyPrototype(
+            definition['kind'], definition['name'], getattr(glyphs, definition['glyph']),
+            definition['hp'], definition['defense'], definition['power'], definition.get('view_range', 6),
+            definition.get('weapon'), definition.get('has_key', False), definition.get('has_item', False),
+            definition.get('has_riddle', False))
+    return prototype
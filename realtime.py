@@ -0,0 +1,235 @@
+import asyncio
+import time
+from array import array
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from events import GameEvent
+from game_session import GameSession
+from input_handler import InputSession, ESC_TIMEOUT, RESIZE
+from profiler import percentile
+
+
+"""realtime.py - игра в реальном времени на asyncio
+KeyStream - асинхронный поток клавиш поверх InputSession
+TickStats - время симуляции каждого такта и время отрисовки каждого кадра
+RealtimeLoop - враги ходят с постоянной частотой тактов, действия игрока применяются сразу,
+экран перерисовывается не чаще max_fps: все изменения за один кадр дают одну отрисовку
+run_realtime() - запускает цикл и возвращает статистику, когда игра закончилась"""
+
+
+MAX_CATCH_UP = 5  # на сколько тактов симуляция может отстать, прежде чем пропущенные такты отбрасываются
+
+
+class KeyStream:
+    """Клавиши InputSession как асинхронный итератор.
+
+    В Unix дескриптор терминала регистрируется в цикле событий (add_reader) и байты читаются,
+    как только пришли; в Windows очередь опрашивается. Итерация заканчивается с концом ввода."""
+
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, keyboard: InputSession):
+        self.keyboard = keyboard
+        self._ready = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._poll: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        fd = self.keyboard.fileno()
+        if fd is not None:
+            self._loop.add_reader(fd, self._on_readable)
+            self._loop.add_reader(self.keyboard.wake_fileno(), self._on_wake)
+        else:
+            self._poll = self._loop.create_task(self._poll_keys())
+        if self.keyboard.keys:
+            self._ready.set()
+
+    def stop(self) -> None:
+        fd = self.keyboard.fileno()
+        if self._loop is not None and fd is not None:
+            self._loop.remove_reader(fd)
+            self._loop.remove_reader(self.keyboard.wake_fileno())
+        if self._poll is not None:
+            self._poll.cancel()
+            self._poll = None
+        self._loop = None
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._keys()
+
+    async def _keys(self) -> AsyncIterator[str]:
+        keys = self.keyboard.keys
+        while True:
+            while keys:
+                yield keys.popleft()
+            if self.keyboard.closed:
+                return
+            self._ready.clear()
+            await self._ready.wait()
+
+    def _on_readable(self) -> None:
+        keyboard = self.keyboard
+        keyboard.read_available()
+        if keyboard.closed:
+            self._loop.remove_reader(keyboard.fileno())
+        elif keyboard.decoder.pending_escape():
+            self._loop.call_later(ESC_TIMEOUT, self._on_escape_timeout)
+        self._ready.set()
+
+    def _on_wake(self) -> None:
+        self.keyboard.drain_wake()
+        self._ready.set()
+
+    def _on_escape_timeout(self) -> None:
+        self.keyboard.flush_escape()
+        if self.keyboard.keys:
+            self._ready.set()
+
+    async def _poll_keys(self) -> None:
+        while True:
+            self.keyboard.read_available()
+            if self.keyboard.keys:
+                self._ready.set()
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+
+class TickStats:
+    """Замеры реального времени: длительность тактов и кадров (в секундах) и их бюджет."""
+
+    def __init__(self, tick_budget: float, frame_budget: float):
+        self.tick_budget = tick_budget
+        self.frame_budget = frame_budget
+        self.tick_times = array('d')
+        self.frame_times = array('d')
+        self.ticks_over_budget = 0
+        self.frames_over_budget = 0
+        self.skipped_ticks = 0
+        self.changes = 0  # изменений состояния, каждое из которых требовало кадра
+
+    def add_tick(self, seconds: float) -> None:
+        self.tick_times.append(seconds)
+        if seconds > self.tick_budget:
+            self.ticks_over_budget += 1
+
+    def add_frame(self, seconds: float) -> None:
+        self.frame_times.append(seconds)
+        if seconds > self.frame_budget:
+            self.frames_over_budget += 1
+
+    def summary(self) -> Dict[str, float]:
+        ticks = sorted(self.tick_times)
+        frames = sorted(self.frame_times)
+        return {
+            'ticks': len(ticks),
+            'tick_budget_ms': self.tick_budget * 1000,
+            'tick_mean_ms': sum(ticks) / len(ticks) * 1000 if ticks else 0.0,
+            'tick_p95_ms': percentile(ticks, 0.95) * 1000,
+            'tick_max_ms': ticks[-1] * 1000 if ticks else 0.0,
+            'ticks_over_budget': self.ticks_over_budget,
+            'skipped_ticks': self.skipped_ticks,
+            'frames': len(frames),
+            'frame_budget_ms': self.frame_budget * 1000,
+            'frame_mean_ms': sum(frames) / len(frames) * 1000 if frames else 0.0,
+            'frame_p95_ms': percentile(frames, 0.95) * 1000,
+            'frame_max_ms': frames[-1] * 1000 if frames else 0.0,
+            'frames_over_budget': self.frames_over_budget,
+            'coalesced_changes': max(0, self.changes - len(frames)),
+        }
+
+
+class RealtimeLoop:
+    """Три задачи в одном потоке: ввод, такты симуляции и отрисовка.
+
+    Пока цикл работает, session.realtime = True: step() применяет только действие игрока,
+    а враги ходят в session.tick() раз в 1 / tick_rate секунд. Каждое изменение лишь отмечает
+    кадр устаревшим; отрисовка ждет отметку и выводит кадр не чаще max_fps раз в секунду.
+    on_events(events) получает события действий и тактов (диалоги, конец игры) и может
+    блокировать цикл, пока игрок в окне диалога - такты в это время не идут."""
+
+    def __init__(self, session: GameSession, keyboard: InputSession, render: Callable[[], None],
+                 on_events: Optional[Callable[[List[GameEvent]], None]] = None,
+                 tick_rate: float = 15.0, max_fps: float = 30.0):
+        self.session = session
+        self.keys = KeyStream(keyboard)
+        self.render = render
+        self.on_events = on_events
+        self.tick_interval = 1.0 / tick_rate
+        self.frame_interval = 1.0 / max_fps
+        self.stats = TickStats(self.tick_interval, self.frame_interval)
+        self._dirty: Optional[asyncio.Event] = None
+        self._done: Optional[asyncio.Event] = None
+
+    async def run(self) -> TickStats:
+        self._dirty = asyncio.Event()
+        self._done = asyncio.Event()
+        self._dirty.set()
+        self.session.realtime = True
+        self.keys.start()
+        tasks = [asyncio.create_task(self._read_input()),
+                 asyncio.create_task(self._simulate()),
+                 asyncio.create_task(self._draw())]
+        try:
+            await self._done.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.keys.stop()
+            self.session.realtime = False
+        return self.stats
+
+    def _changed(self, events: List[GameEvent]) -> None:
+        self.stats.changes += 1
+        self._dirty.set()
+        if events and self.on_events is not None:
+            self.on_events(events)
+        if not self.session.running:
+            self._done.set()
+
+    async def _read_input(self) -> None:
+        async for key in self.keys:
+            if key == RESIZE:
+                self._dirty.set()  # только перерисовать под новый размер терминала
+                continue
+            self._changed(self.session.step(key))
+            if not self.session.running:
+                return
+        self._done.set()  # ввод закончился
+
+    async def _simulate(self) -> None:
+        loop = asyncio.get_running_loop()
+        session = self.session
+        interval = self.tick_interval
+        next_tick = loop.time() + interval
+        while session.running:
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            start = time.perf_counter()
+            events = session.tick()
+            self.stats.add_tick(time.perf_counter() - start)
+            if events or session.scheduler.awake():
+                self._changed(events)
+            next_tick += interval
+            # После долгой паузы (диалог, медленный кадр) такты не догоняются пачкой
+            behind = loop.time() - next_tick
+            if behind > interval * MAX_CATCH_UP:
+                self.stats.skipped_ticks += int(behind / interval)
+                next_tick = loop.time() + interval
+
+    async def _draw(self) -> None:
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            start = time.perf_counter()
+            self.render()
+            elapsed = time.perf_counter() - start
+            self.stats.add_frame(elapsed)
+            # Изменения, пришедшие до следующего кадра, попадут в одну отрисовку
+            await asyncio.sleep(max(0.0, self.frame_interval - elapsed))
+
+
+def run_realtime(session: GameSession, keyboard: InputSession, render: Callable[[], None],
+                 on_events: Optional[Callable[[List[GameEvent]], None]] = None,
+                 tick_rate: float = 15.0, max_fps: float = 30.0) -> TickStats:
+    return asyncio.run(RealtimeLoop(session, keyboard, render, on_events, tick_rate, max_fps).run())
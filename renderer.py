@@ -1,58 +1,219 @@
 import os
+import signal
+import sys
 from colorama import Fore, Style
-from entities import Player, Enemy, Item
+from entities import Player
 from map_generator import Floor
-from typing import List, Tuple, Optional
+from glyphs import GLYPHS, BLANK, TILE_VISIBLE, TILE_REMEMBERED
+from spatial_index import EnemyIndex, ItemIndex
+from typing import Callable, List, Tuple, Optional, TextIO
 
 
 """renderer.py - отрисовка игры:
-render_game() - выводит текущее состояние игры (карту, персонажей, интерфейс)"""
-
-def render_game(player: Player, dungeon: List[Floor], enemies: List[Enemy], items: List[Tuple[Item, int, int, int]], message: str):
-    os.system('cls' if os.name == 'nt' else 'clear')
-    print("                                                                                       ")
-    print(Style.BRIGHT + Fore.CYAN + f"                           Этаж {player.current_floor + 1} " +
-          Fore.RED + f"  HP: {player.hp}/{player.max_hp} " +
-          Fore.MAGENTA + f"  Оружие: {player.equipped_weapon.name}     " + Fore.RESET + Style.RESET_ALL)
-    print("                                                                                       ")
-
-    current_floor = player.current_floor
-    floor = dungeon[current_floor]
-
-    for y in range(floor.height):
-        row = ""
-        for x in range(floor.width):
-            tile = floor.tiles[x][y]
-            if not tile.explored:
-                row += " "
-                continue
-            if player.x == x and player.y == y and player.current_floor == current_floor:
-                row += player.char
-            else:
-                enemy_here = False
-                for enemy in enemies:
-                    if enemy.x == x and enemy.y == y and enemy.current_floor == current_floor:
-                        row += enemy.char
-                        enemy_here = True
-                        break
-                if not enemy_here:
-                    item_here = False
-                    for item, item_x, item_y, item_floor in items:
-                        if item_x == x and item_y == y and item_floor == current_floor:
-                            row += item.char
-                            item_here = True
-                            break
-                    if not item_here:
-                        row += str(tile)
-        print(row)
-
-    if message:
-        print(message)
-
-    print("\n " + Fore.RESET)
-    print(Fore.GREEN + "                   SPACE" + Fore.RESET + " — атака  " +
-          Fore.GREEN + " E" + Fore.RESET + " — использовать лестницу  " +
-          Fore.GREEN + " G " + Fore.RESET + "— поднять предмет  ")
-    print(Fore.GREEN + "                           F" + Fore.RESET + " — взаимодействие  " +
-          Fore.GREEN + " I" + Fore.RESET + " — инвентарь  " +
-          Fore.GREEN + " Q" + Fore.RESET + " — выход  " + Fore.RESET)
\ No newline at end of file
+FrameRenderer - хранит последний кадр и выводит только изменившиеся ячейки
+Camera - окно этажа размером с терминал, которое следует за игроком
+render_game() - выводит текущее состояние игры (карту, персонажей, интерфейс)
+invalidate_frame() - требует полной перерисовки (после диалогов и других экранов)
+frame_renderer() - общий FrameRenderer, через который рисует render_game()"""
+
+
+HUD_ROW = 2
+MAP_TOP = 4
+MESSAGE_LINES = 3
+
+DEFAULT_TERMINAL_SIZE = (120, 40)  # если вывод не в терминал (столбцы, строки)
+
+CLEAR_SCREEN = "\033[2J"
+CLEAR_LINE_END = Style.RESET_ALL + "\033[K"
+
+FOOTER = [
+    "",
+    " " + Fore.RESET,
+    Fore.GREEN + "                   SPACE" + Fore.RESET + " — атака  " +
+    Fore.GREEN + " E" + Fore.RESET + " — использовать лестницу  " +
+    Fore.GREEN + " G " + Fore.RESET + "— поднять предмет  ",
+    Fore.GREEN + "                           F" + Fore.RESET + " — взаимодействие  " +
+    Fore.GREEN + " I" + Fore.RESET + " — инвентарь  " +
+    Fore.GREEN + " Q" + Fore.RESET + " — выход  " + Fore.RESET,
+]
+
+
+def _move_to(row: int, col: int) -> str:
+    # Escape-последовательность перемещения курсора (нумерация с 1)
+    return f"\033[{row};{col}H"
+
+
+class Camera:
+    """Окно этажа width x height с левым верхним углом (x, y).
+
+    Окно сдвигается, только когда игрок подходит к его краю ближе чем на четверть размера,
+    и не выходит за границы этажа; этаж меньше окна показывается целиком."""
+
+    def __init__(self):
+        self.x = self.y = 0
+        self.width = self.height = 0
+
+    def resize(self, width: int, height: int) -> None:
+        self.width, self.height = max(1, width), max(1, height)
+
+    def follow(self, px: int, py: int, floor_width: int, floor_height: int) -> Tuple[int, int, int, int]:
+        """Сдвигает окно к игроку; возвращает видимую часть этажа (x, y, ширина, высота)."""
+        width, height = min(self.width, floor_width), min(self.height, floor_height)
+        self.x = self._axis(self.x, px, width, floor_width)
+        self.y = self._axis(self.y, py, height, floor_height)
+        return self.x, self.y, width, height
+
+    @staticmethod
+    def _axis(origin: int, position: int, size: int, limit: int) -> int:
+        margin = size // 4
+        if position < origin + margin:
+            origin = position - margin
+        elif position >= origin + size - margin:
+            origin = position - size + margin + 1
+        return max(0, min(origin, limit - size))
+
+
+class FrameRenderer:
+    """Отрисовщик, сравнивающий новый кадр с предыдущим и выводящий только разницу.
+
+    Выводится только окно камеры, поэтому время кадра зависит от размера терминала, а не
+    этажа. Размер терминала узнается при первом кадре и после invalidate(); watch_resize()
+    подписывается на SIGWINCH, и следующий кадр подстраивается под новый размер
+    (on_resize будит цикл ввода, чтобы этот кадр был нарисован сразу).
+    size задает размер экрана явно (столбцы, строки), например для вывода в память."""
+
+    def __init__(self, stream: Optional[TextIO] = None, size: Optional[Tuple[int, int]] = None):
+        self.stream = stream if stream is not None else sys.stdout
+        self.size = size
+        self.camera = Camera()
+        self._resized = False
+        self._on_resize_callback: Optional[Callable[[], None]] = None
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Забывает последний кадр, следующий render() перерисует экран целиком."""
+        self._cells: Optional[List[List[int]]] = None
+        self._size: Optional[Tuple[int, int]] = None
+        self._hud: Optional[str] = None
+        self._lines: List[str] = []
+        self._terminal: Optional[Tuple[int, int]] = None
+
+    def watch_resize(self, on_resize: Optional[Callable[[], None]] = None) -> None:
+        """Перерисовывает кадр под новый размер терминала после SIGWINCH (где он есть).
+        on_resize вызывается из обработчика сигнала, например InputSession.wake."""
+        self._on_resize_callback = on_resize
+        if hasattr(signal, 'SIGWINCH'):
+            signal.signal(signal.SIGWINCH, self._on_resize)
+
+    def _on_resize(self, signum, frame) -> None:
+        # Сигнал может прийти посреди render(), поэтому здесь только ставится отметка
+        self._resized = True
+        if self._on_resize_callback is not None:
+            self._on_resize_callback()
+
+    def _terminal_size(self) -> Tuple[int, int]:
+        if self.size is not None:
+            return self.size
+        try:
+            columns, lines = os.get_terminal_size(self.stream.fileno())
+        except (AttributeError, ValueError, OSError):
+            columns, lines = DEFAULT_TERMINAL_SIZE
+        return columns, lines
+
+    def render(self, player: Player, dungeon: List[Floor], enemies: EnemyIndex,
+               items: ItemIndex, message: str) -> None:
+        """Собирает кадр и одной записью выводит изменившиеся ячейки, HUD и строки сообщений."""
+        current_floor = player.current_floor
+        floor = dungeon[current_floor]
+        out = []
+
+        if self._resized:
+            # Терминал после изменения размера переносит строки по-своему - рисуем заново
+            self._resized = False
+            self.invalidate()
+        if self._terminal is None:
+            self._terminal = self._terminal_size()
+            columns, lines = self._terminal
+            self.camera.resize(columns, lines - MAP_TOP - MESSAGE_LINES - len(FOOTER))
+        left, top_row, view_width, view_height = self.camera.follow(player.x, player.y,
+                                                                     floor.width, floor.height)
+        if self._cells is None or self._size != (view_width, view_height):
+            # Новый размер окна (другой этаж или терминал) - экран перерисовывается целиком,
+            # а при прокрутке окна выводятся только ячейки, которые на экране поменялись
+            out.append(CLEAR_SCREEN)
+            self._cells = [[None] * view_width for _ in range(view_height)]
+            self._size = (view_width, view_height)
+            self._hud = None
+            self._lines = []
+
+        hud = (Style.BRIGHT + Fore.CYAN + f"                           Этаж {current_floor + 1} " +
+               Fore.RED + f"  HP: {player.hp}/{player.max_hp} " +
+               Fore.MAGENTA + f"  Оружие: {player.equipped_weapon.name}     " + Fore.RESET + Style.RESET_ALL)
+        if hud != self._hud:
+            out.append(_move_to(HUD_ROW, 1) + hud + CLEAR_LINE_END)
+            self._hud = hud
+
+        enemy_cells = enemies.cells(current_floor)
+        item_cells = items.cells(current_floor)
+        tile_types = floor.tile_types
+        explored = floor.explored
+        visible = floor.visible
+        for screen_y in range(view_height):
+            previous_row = self._cells[screen_y]
+            y = top_row + screen_y
+            row = y * floor.width
+            for screen_x in range(view_width):
+                x = left + screen_x
+                index = row + x
+                if not explored[index]:
+                    glyph = BLANK
+                elif player.x == x and player.y == y:
+                    glyph = player.glyph
+                elif index not in visible:
+                    item_stack = item_cells.get((x, y))
+                    glyph = item_stack[-1].glyph if item_stack else TILE_REMEMBERED[tile_types[index]]
+                elif (x, y) in enemy_cells:
+                    glyph = enemy_cells[(x, y)][0].glyph
+                elif (x, y) in item_cells:
+                    glyph = item_cells[(x, y)][-1].glyph
+                else:
+                    glyph = TILE_VISIBLE[tile_types[index]]
+                if previous_row[screen_x] != glyph:
+                    previous_row[screen_x] = glyph
+                    out.append(_move_to(MAP_TOP + screen_y, screen_x + 1) + GLYPHS[glyph])
+
+        lines = message.split("\n") if message else []
+        lines += [""] * (MESSAGE_LINES - len(lines))
+        lines += FOOTER
+        top = MAP_TOP + view_height
+        for i, line in enumerate(lines):
+            if i >= len(self._lines) or self._lines[i] != line:
+                out.append(_move_to(top + i, 1) + line + CLEAR_LINE_END)
+        for i in range(len(lines), len(self._lines)):
+            out.append(_move_to(top + i, 1) + CLEAR_LINE_END)
+        self._lines = lines
+
+        if out:
+            out.append(_move_to(top + len(lines), 1))
+            self._write("".join(out))
+
+    def _write(self, text: str) -> None:
+        # Единственное место вывода кадра в терминал (профилировщик считает здесь байты)
+        self.stream.write(text)
+        self.stream.flush()
+
+
+_renderer = FrameRenderer()
+
+
+def frame_renderer() -> FrameRenderer:
+    """Отрисовщик, которым пользуется render_game()."""
+    return _renderer
+
+
+def render_game(player: Player, dungeon: List[Floor], enemies: EnemyIndex, items: ItemIndex, message: str):
+    _renderer.render(player, dungeon, enemies, items, message)
+
+
+def invalidate_frame() -> None:
+    _renderer.invalidate()
@@ -0,0 +1,250 @@
+import argparse
+import hashlib
+import struct
+import sys
+import time
+from typing import List, Optional, Tuple
+from game_session import GameSession
+from save_game import serialize, deserialize
+
+
+"""replay.py - запись ввода игрока и быстрое воспроизведение без терминала
+Recorder - пишет параметры игры (или исходное сохранение) и каждое действие, переданное в
+GameSession.step() (клавиши, выбор в диалоге и инвентаре) и GameSession.tick(), а в конце -
+хэш итогового состояния
+read_recording(), replay() - читают запись и повторяют ее на новой сессии так быстро, как
+позволяет процессор; совпадение хэша подтверждает, что игра воспроизвелась точно.
+Запуск: python replay.py запись.rec [--repeat N]"""
+
+
+MAGIC = b'PRRP'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHBB')         # magic, версия, вид начала (NEW_GAME или LOADED_GAME), флаги
+NEW_GAME_PARAMS = struct.Struct('<IIIHq')  # width, height, num_floors, workers, зерно игры (со знаком)
+LENGTH = struct.Struct('<I')
+CHOICE = struct.Struct('<h')
+TICK_COUNT = struct.Struct('<H')
+END = struct.Struct('<I16s')             # ход, хэш итогового состояния
+
+NEW_GAME = 0
+LOADED_GAME = 1  # игра продолжена из сохранения: файл сохранения лежит в записи целиком
+
+REALTIME = 1  # флаг: игра шла в реальном времени (враги ходят только в тактах)
+
+# Коды действий: клавиши игры занимают по одному байту
+KEYS = ('w', 'a', 's', 'd', ' ', 'e', 'g', 'f', 'i', 'q')
+CODE_ANSWER = len(KEYS)   # + CHOICE
+CODE_USE = CODE_ANSWER + 1  # + CHOICE
+CODE_NO_KEY = CODE_USE + 1  # step(None): клавиша не получена
+CODE_OTHER = CODE_NO_KEY + 1  # + байт длины и строка (клавиши, которые игра не знает)
+CODE_TICKS = CODE_OTHER + 1  # + TICK_COUNT тактов реального времени подряд
+CODE_END = CODE_TICKS + 1  # + END
+KEY_CODES = {key: code for code, key in enumerate(KEYS)}
+CHOICE_CODES = {'answer': CODE_ANSWER, 'use': CODE_USE}
+
+TICK = 'tick'  # действие записи, соответствующее GameSession.tick()
+BUFFER_SIZE = 64 * 1024
+
+
+class ReplayError(Exception):
+    """Файл не является записью этой версии или поврежден."""
+
+
+def state_hash(session: GameSession) -> bytes:
+    """Хэш всего состояния игры (по байтам сохранения)."""
+    return hashlib.blake2b(serialize(session), digest_size=16).digest()
+
+
+class Recorder:
+    """Запись одной игры. Действия дописываются в буферизованный файл по мере игры,
+    так что после аварийного выхода остается запись без итогового хэша."""
+
+    def __init__(self, path: str, session: GameSession, workers: Optional[int] = None,
+                 save_data: Optional[bytes] = None, realtime: bool = False):
+        # save_data - содержимое сохранения, если игра продолжена из него (--load)
+        flags = REALTIME if realtime else 0
+        self.path = path
+        self._file = open(path, 'wb', buffering=BUFFER_SIZE)
+        self._ticks = 0
+        if save_data is None:
+            generator = session.map_generator
+            name = session.player.name.encode('utf-8')
+            self._file.write(HEADER.pack(MAGIC, VERSION, NEW_GAME, flags) +
+                             NEW_GAME_PARAMS.pack(generator.width, generator.height, generator.num_floors,
+                                                  workers or 0, session.seed) +
+                             LENGTH.pack(len(name)) + name)
+        else:
+            self._file.write(HEADER.pack(MAGIC, VERSION, LOADED_GAME, flags) +
+                             LENGTH.pack(len(save_data)) + save_data)
+
+    def attach(self, session: GameSession) -> None:
+        """Записывает все последующие step() и tick() сессии (методы подменяются у экземпляра)."""
+        step, tick = session.step, session.tick
+
+        def recorded_step(action, choice=None):
+            self.record(action, choice)
+            return step(action, choice)
+
+        def recorded_tick():
+            self.record(TICK)
+            return tick()
+        session.step = recorded_step
+        session.tick = recorded_tick
+
+    def record(self, action: Optional[str], choice: Optional[int] = None) -> None:
+        if action == TICK:
+            self._ticks += 1
+            if self._ticks == 0xFFFF:
+                self._flush_ticks()
+            return
+        if self._ticks:
+            self._flush_ticks()
+        code = KEY_CODES.get(action) if action is not None else CODE_NO_KEY
+        if code is not None:
+            self._file.write(bytes((code,)))
+        elif action in CHOICE_CODES:
+            self._file.write(bytes((CHOICE_CODES[action],)) + CHOICE.pack(-1 if choice is None else choice))
+        else:
+            raw = action.encode('utf-8')[:255]
+            self._file.write(bytes((CODE_OTHER, len(raw))) + raw)
+
+    def close(self, session: GameSession) -> None:
+        """Завершает запись хэшем итогового состояния сессии."""
+        if self._file is None:
+            return
+        if self._ticks:
+            self._flush_ticks()
+        self._file.write(bytes((CODE_END,)) + END.pack(session.turn, state_hash(session)))
+        self._file.close()
+        self._file = None
+
+    def _flush_ticks(self) -> None:
+        self._file.write(bytes((CODE_TICKS,)) + TICK_COUNT.pack(self._ticks))
+        self._ticks = 0
+
+
+class Recording:
+    """Прочитанная запись: как начать игру и список действий (action, choice)."""
+
+    def __init__(self):
+        self.width = self.height = self.num_floors = self.workers = self.seed = 0
+        self.player_name = ""
+        self.realtime = False
+        self.save_data: Optional[bytes] = None
+        self.actions: List[Tuple[Optional[str], Optional[int]]] = []
+        self.final_turn: Optional[int] = None
+        self.final_hash: Optional[bytes] = None  # None - запись оборвана
+
+    def new_session(self) -> GameSession:
+        """Сессия в начальном состоянии записи (без фоновой предзагрузки этажей)."""
+        if self.save_data is not None:
+            return deserialize(self.save_data, prefetch=False)
+        return GameSession(width=self.width, height=self.height, num_floors=self.num_floors,
+                           player_name=self.player_name, workers=self.workers or None,
+                           seed=self.seed, prefetch=False)
+
+
+def read_recording(path: str) -> Recording:
+    with open(path, 'rb') as f:
+        data = f.read()
+    view = memoryview(data)
+    recording = Recording()
+    try:
+        magic, version, start, flags = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError(f"{path}: не запись версии {VERSION}")
+        recording.realtime = bool(flags & REALTIME)
+        offset = HEADER.size
+        if start == NEW_GAME:
+            (recording.width, recording.height, recording.num_floors, recording.workers,
+             recording.seed) = NEW_GAME_PARAMS.unpack_from(view, offset)
+            offset += NEW_GAME_PARAMS.size
+            length, = LENGTH.unpack_from(view, offset)
+            offset += LENGTH.size
+            recording.player_name = bytes(view[offset:offset + length]).decode('utf-8')
+        else:
+            length, = LENGTH.unpack_from(view, offset)
+            offset += LENGTH.size
+            recording.save_data = bytes(view[offset:offset + length])
+        offset += length
+
+        actions = recording.actions
+        append = actions.append
+        while offset < len(data):
+            code = data[offset]
+            offset += 1
+            if code < CODE_ANSWER:
+                append((KEYS[code], None))
+            elif code == CODE_ANSWER or code == CODE_USE:
+                choice, = CHOICE.unpack_from(view, offset)
+                offset += CHOICE.size
+                append(('answer' if code == CODE_ANSWER else 'use', choice))
+            elif code == CODE_NO_KEY:
+                append((None, None))
+            elif code == CODE_OTHER:
+                length = data[offset]
+                append((bytes(view[offset + 1:offset + 1 + length]).decode('utf-8'), None))
+                offset += 1 + length
+            elif code == CODE_TICKS:
+                count, = TICK_COUNT.unpack_from(view, offset)
+                offset += TICK_COUNT.size
+                actions.extend([(TICK, None)] * count)
+            elif code == CODE_END:
+                recording.final_turn, recording.final_hash = END.unpack_from(view, offset)
+                break
+            else:
+                raise ReplayError(f"{path}: неизвестный код действия {code}")
+    except (struct.error, IndexError, UnicodeDecodeError):
+        raise ReplayError(f"{path}: файл обрезан или поврежден")
+    return recording
+
+
+def replay(recording: Recording) -> Tuple[GameSession, float]:
+    """Выполняет все действия записи на новой сессии. Возвращает сессию и время выполнения
+    действий в секундах (без создания сессии)."""
+    session = recording.new_session()
+    step, tick = session.step, session.tick
+    session.realtime = recording.realtime
+    start = time.perf_counter()
+    for action, choice in recording.actions:
+        if action == TICK:
+            tick()
+        else:
+            step(action, choice)
+    elapsed = time.perf_counter() - start
+    session.close()
+    return session, elapsed
+
+
+def verify(recording: Recording, session: GameSession) -> Optional[bool]:
+    """Совпадает ли состояние после воспроизведения с записанным (None - хэша в записи нет)."""
+    if recording.final_hash is None:
+        return None
+    return session.turn == recording.final_turn and state_hash(session) == recording.final_hash
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Воспроизведение записанной игры без терминала")
+    parser.add_argument('path', help="файл записи")
+    parser.add_argument('--repeat', type=int, default=1, help="сколько раз воспроизвести (для замеров)")
+    args = parser.parse_args(argv)
+
+    recording = read_recording(args.path)
+    results = []
+    for _ in range(max(1, args.repeat)):
+        session, elapsed = replay(recording)
+        results.append(elapsed)
+        matched = verify(recording, session)
+    best = min(results)
+    print(f"действий: {len(recording.actions)}, ход: {session.turn}, "
+          f"лучшее время: {best * 1000:.1f} мс ({len(recording.actions) / best if best else 0:.0f} действий/с)")
+    if matched is None:
+        print("итоговый хэш не записан (игра прервалась)")
+        return 0
+    print("состояние совпало" if matched else "СОСТОЯНИЕ НЕ СОВПАЛО")
+    return 0 if matched else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
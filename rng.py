@@ -0,0 +1,60 @@
+import hashlib
+import random
+from typing import Optional
+
+
+"""rng.py - воспроизводимые источники случайности
+derive_seed() - независимое зерно из общего зерна и меток, одинаковое во всех процессах
+new_seed() - случайное зерно для игры, запущенной без --seed
+RandomStreams - отдельные генераторы random.Random для подсистем игры"""
+
+
+# Зерно игры хранится в сохранениях и записях как знаковое 64-битное число
+SEED_MIN = -2 ** 63
+SEED_MAX = 2 ** 63 - 1
+
+
+def derive_seed(seed: int, *labels) -> int:
+    # Детерминированно получает независимое зерно из общего зерна и меток (например, номера этажа).
+    # Не зависит от PYTHONHASHSEED, поэтому совпадает в разных процессах.
+    text = ":".join(str(part) for part in (seed,) + labels)
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big')
+
+
+def new_seed() -> int:
+    return random.SystemRandom().getrandbits(63)
+
+
+class RandomStreams:
+    """Генераторы случайных чисел подсистем, выведенные из одного зерна игры.
+
+    Каждая подсистема тянет числа только из своего потока, поэтому, например,
+    лишний бросок в ИИ врагов не сдвигает раскладку карты или предметов."""
+
+    # loot - выбор этажа для ключа и выпадение предметов при смерти,
+    # ai - блуждание врагов, riddles - выбор загадок.
+    # Расстановка врагов и предметов этажа берет отдельный генератор for_floor(),
+    # чтобы не зависеть от того, в каком порядке игрок посещает этажи.
+    NAMES = ('loot', 'ai', 'riddles')
+
+    def __init__(self, seed: Optional[int] = None):
+        if seed is not None and not SEED_MIN <= seed <= SEED_MAX:
+            raise ValueError(f"Зерно игры должно быть от {SEED_MIN} до {SEED_MAX}")
+        self.seed = seed if seed is not None else new_seed()
+        # Карта генерируется по этажам своими генераторами, ей нужно только зерно
+        self.map_seed = derive_seed(self.seed, 'map')
+        self.loot = random.Random(derive_seed(self.seed, 'loot'))
+        self.ai = random.Random(derive_seed(self.seed, 'ai'))
+        self.riddles = random.Random(derive_seed(self.seed, 'riddles'))
+
+    def for_floor(self, name: str, floor_num: int) -> random.Random:
+        """Свежий генератор подсистемы name для этажа floor_num (например, 'spawn' или 'loot')."""
+        return random.Random(derive_seed(self.seed, name, floor_num))
+
+    def getstate(self) -> dict:
+        """Состояния всех потоков (для сохранения игры)."""
+        return {name: getattr(self, name).getstate() for name in self.NAMES}
+
+    def setstate(self, state: dict) -> None:
+        for name, stream_state in state.items():
+            getattr(self, name).setstate(stream_state)
@@ -0,0 +1,392 @@
+import json
+import math
+import os
+import struct
+from array import array
+from typing import Dict, List, Optional
+from entities import Player, Enemy, HostileEnemy, NeutralEnemy, Item, Key, Weapon, Food
+from map_generator import MapGenerator, Floor, Room
+from dungeon import Dungeon
+from spatial_index import EnemyIndex, ItemIndex
+from components import EnemyStore
+from prototypes import ItemPrototype
+from rng import RandomStreams
+from content import RiddleDeck
+import content
+from game_session import GameSession
+
+
+"""save_game.py - компактное двоичное сохранение всей игры
+save_game() - записывает состояние GameSession в файл
+load_game() - восстанавливает GameSession из файла
+serialize(), deserialize() - то же без файла: состояние <-> байты
+Формат (little-endian): заголовок, параметры генератора, таблица строк, таблица предметов,
+созданные этажи (типы плиток и маска исследованного - сырые массивы байт; еще не созданные
+этажи отмечены флагом и будут сгенерированы при посещении), записи врагов фиксированного
+размера, предметы на карте, игрок, статистика, состояния генераторов случайных чисел и колода загадок.
+Сетки читаются срезами одного буфера, без разбора по клеткам."""
+
+
+MAGIC = b'PRSV'
+VERSION = 3
+NONE = 0xFFFFFFFF  # отсутствующая строка или предмет
+
+HEADER = struct.Struct('<4sHqIiQ')         # magic, версия, зерно игры (со знаком), ход, этаж ключа, длина файла
+GENERATOR = struct.Struct('<6IQ')          # width, height, num_floors, max_rooms, min/max_room_size, seed карты
+COUNT = struct.Struct('<I')
+FLAG = struct.Struct('<B')
+ITEM = struct.Struct('<BIHIi')             # вид, имя, глиф, цвет, значение (номер ключа / урон / сытность)
+FLOOR = struct.Struct('<5I')               # width, height, комнат, лестниц вверх, лестниц вниз
+ENEMY = struct.Struct('<BIiiHIiiiiiIIH')   # вид, этаж, x, y, глиф, имя, hp, max_hp, defense, power,
+                                           # view_range, оружие, загадка, флаги
+MAP_ITEM = struct.Struct('<IIii')          # предмет, этаж, x, y
+PLAYER = struct.Struct('<IiiIiiiiiII')     # имя, x, y, этаж, hp, max_hp, defense, power, keys_found,
+                                           # экипированное оружие, оружие в инвентаре
+STATISTICS = struct.Struct('<6i')          # убито, подобрано, съедено, атак, урона получено, ключей
+RNG_STATE = struct.Struct('<B625Id')       # версия, состояние Mersenne Twister, gauss_next (NaN - нет)
+
+ITEM_PLAIN, ITEM_KEY, ITEM_WEAPON, ITEM_FOOD = range(4)
+ENEMY_HOSTILE, ENEMY_NEUTRAL = range(2)
+
+# Флаги врага
+HAS_KEY = 1
+AGGRAVATED = 2
+HAS_ITEM = 4
+HAS_RIDDLE = 8
+HAS_GIVEN_RIDDLE = 16
+HAS_GIVEN_KEY = 32
+RIDDLE_FAILED = 64
+
+NEUTRAL_FLAGS = (('aggravated', AGGRAVATED), ('has_given_riddle', HAS_GIVEN_RIDDLE),
+                 ('has_given_key', HAS_GIVEN_KEY), ('riddle_failed', RIDDLE_FAILED))
+
+
+class SaveError(Exception):
+    """Файл не является сохранением этой версии или поврежден."""
+
+
+class _Writer:
+    # Собирает файл: записи пишутся в body, строки и предметы складываются в таблицы
+
+    def __init__(self):
+        self.body = bytearray()
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self.items: List[Item] = []
+        self._item_ids: Dict[int, int] = {}
+
+    def string(self, text: Optional[str]) -> int:
+        if text is None:
+            return NONE
+        index = self._string_ids.get(text)
+        if index is None:
+            index = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def item(self, item: Optional[Item]) -> int:
+        # Один и тот же объект предмета (например, экипированное оружие) записывается один раз
+        if item is None:
+            return NONE
+        index = self._item_ids.get(id(item))
+        if index is None:
+            index = self._item_ids[id(item)] = len(self.items)
+            self.items.append(item)
+        return index
+
+    def pack(self, fmt: struct.Struct, *values) -> None:
+        self.body += fmt.pack(*values)
+
+    def indices(self, values: List[int]) -> None:
+        self.pack(COUNT, len(values))
+        self.body += array('I', values).tobytes()
+
+
+class _Reader:
+    # Последовательное чтение записей из буфера файла
+
+    def __init__(self, data: bytes):
+        self.view = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        values = fmt.unpack_from(self.view, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def count(self) -> int:
+        return self.unpack(COUNT)[0]
+
+    def raw(self, size: int) -> memoryview:
+        chunk = self.view[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def indices(self) -> List[int]:
+        values = array('I')
+        values.frombytes(self.raw(self.count() * values.itemsize))
+        return values.tolist()
+
+
+def _item_record(item: Item, writer: _Writer) -> bytes:
+    if isinstance(item, Key):
+        kind, value = ITEM_KEY, item.key_number
+    elif isinstance(item, Weapon):
+        kind, value = ITEM_WEAPON, item.damage
+    elif isinstance(item, Food):
+        kind, value = ITEM_FOOD, item.nutrition
+    else:
+        kind, value = ITEM_PLAIN, 0
+    return ITEM.pack(kind, writer.string(item.name), item.glyph, writer.string(item.color), value)
+
+
+def _make_item(kind: int, name: str, glyph: int, color: str, value: int) -> Item:
+    if kind == ITEM_KEY:
+        return Key(value)
+    if kind == ITEM_WEAPON:
+        return Weapon(name, glyph, value, color)
+    if kind == ITEM_FOOD:
+        return Food(name, glyph, value, color)
+    return Item(name, glyph, color)
+
+
+def _pack_rng_state(state: tuple) -> bytes:
+    version, internal, gauss_next = state
+    return RNG_STATE.pack(version, *internal, math.nan if gauss_next is None else gauss_next)
+
+
+def _unpack_rng_state(values: tuple) -> tuple:
+    gauss_next = values[-1]
+    return values[0], tuple(values[1:-1]), None if math.isnan(gauss_next) else gauss_next
+
+
+def _write_floor(writer: _Writer, floor: Floor) -> None:
+    # Проходы комнат (openings) нужны только во время генерации и не сохраняются
+    writer.pack(FLOOR, floor.width, floor.height, len(floor.rooms),
+                len(floor.stairs_up), len(floor.stairs_down))
+    writer.body += floor.tile_types
+    writer.body += floor.explored
+    rooms = array('i')
+    for room in floor.rooms:
+        rooms.extend((room.x1, room.y1, room.x2, room.y2))
+    writer.body += rooms.tobytes()
+    stairs = array('i')
+    for x, y in floor.stairs_up + floor.stairs_down:
+        stairs.extend((x, y))
+    writer.body += stairs.tobytes()
+
+
+def _read_floor(reader: _Reader) -> Floor:
+    width, height, num_rooms, num_up, num_down = reader.unpack(FLOOR)
+    floor = Floor(width, height)
+    size = width * height
+    floor.tile_types[:] = reader.raw(size)
+    floor.explored[:] = reader.raw(size)
+    rooms = array('i')
+    rooms.frombytes(reader.raw(num_rooms * 4 * rooms.itemsize))
+    for i in range(0, len(rooms), 4):
+        x1, y1, x2, y2 = rooms[i:i + 4]
+        floor.rooms.append(Room(x1, y1, x2 - x1, y2 - y1))
+    stairs = array('i')
+    stairs.frombytes(reader.raw((num_up + num_down) * 2 * stairs.itemsize))
+    points = [(stairs[i], stairs[i + 1]) for i in range(0, len(stairs), 2)]
+    floor.stairs_up = points[:num_up]
+    floor.stairs_down = points[num_up:]
+    return floor
+
+
+def _write_enemy(writer: _Writer, enemy: Enemy) -> None:
+    flags = 0
+    riddle = None
+    if isinstance(enemy, NeutralEnemy):
+        kind = ENEMY_NEUTRAL
+        view_range = 0
+        if enemy.has_item:
+            flags |= HAS_ITEM
+        if enemy.has_riddle:
+            flags |= HAS_RIDDLE
+        for name, flag in NEUTRAL_FLAGS:
+            if getattr(enemy, name):
+                flags |= flag
+        if enemy.current_riddle is not None:
+            riddle = json.dumps(enemy.current_riddle, ensure_ascii=False)
+    else:
+        kind = ENEMY_HOSTILE
+        view_range = enemy.view_range
+        if enemy.has_key:
+            flags |= HAS_KEY
+    writer.pack(ENEMY, kind, enemy.current_floor, enemy.x, enemy.y, enemy.glyph, writer.string(enemy.name),
+                enemy.hp, enemy.max_hp, enemy.defense, enemy.power, view_range,
+                writer.item(enemy.weapon), writer.string(riddle), flags)
+
+
+def _read_enemy(reader: _Reader, strings: List[str], items: List[Item]) -> Enemy:
+    (kind, floor, x, y, glyph, name, hp, max_hp, defense, power, view_range,
+     weapon, riddle, flags) = reader.unpack(ENEMY)
+    weapon = items[weapon] if weapon != NONE else None
+    if kind == ENEMY_NEUTRAL:
+        enemy = NeutralEnemy(x, y, glyph, strings[name], max_hp, defense, power, weapon=weapon,
+                             has_item=bool(flags & HAS_ITEM), has_riddle=bool(flags & HAS_RIDDLE))
+        for attr, flag in NEUTRAL_FLAGS:
+            setattr(enemy, attr, bool(flags & flag))
+        if riddle != NONE:
+            enemy.current_riddle = json.loads(strings[riddle])
+    else:
+        enemy = HostileEnemy(x, y, glyph, strings[name], max_hp, defense, power, view_range=view_range,
+                             weapon=weapon, has_key=bool(flags & HAS_KEY))
+    enemy.hp = hp
+    enemy.current_floor = floor
+    return enemy
+
+
+def save_game(session: GameSession, path: str) -> int:
+    """Записывает сессию в файл path (через временный файл). Возвращает размер файла в байтах."""
+    data = serialize(session)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return len(data)
+
+
+def load_game(path: str) -> GameSession:
+    """Читает сохранение целиком одним вызовом и восстанавливает по нему GameSession."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return deserialize(data, path)
+
+
+def serialize(session: GameSession) -> bytes:
+    """Содержимое файла сохранения для сессии. Одинаковое состояние дает одинаковые байты."""
+    writer = _Writer()
+    generator = session.map_generator
+    writer.pack(GENERATOR, generator.width, generator.height, generator.num_floors, generator.max_rooms,
+                generator.min_room_size, generator.max_room_size, generator.seed)
+
+    generated = session.dungeon.generated()
+    writer.pack(COUNT, len(session.dungeon))
+    for floor_num in range(len(session.dungeon)):
+        floor = generated.get(floor_num)
+        writer.pack(FLAG, floor is not None)
+        if floor is not None:
+            _write_floor(writer, floor)
+
+    # Враги пишутся в порядке планировщика (спящие, затем бодрствующие), чтобы после загрузки
+    # они просыпались и ходили в том же порядке
+    sleeping, awake = session.scheduler.snapshot()
+    known = set(sleeping) | set(awake)
+    enemies = sleeping + [enemy for enemy in session.enemies if enemy not in known] + awake
+    writer.pack(COUNT, len(enemies))
+    for enemy in enemies:
+        _write_enemy(writer, enemy)
+    writer.pack(COUNT, len(awake))
+
+    writer.pack(COUNT, len(session.items))
+    for item, x, y, floor in session.items:
+        writer.pack(MAP_ITEM, writer.item(item), floor, x, y)
+
+    player = session.player
+    inventory = player.inventory
+    writer.pack(PLAYER, writer.string(player.name), player.x, player.y, player.current_floor, player.hp,
+                player.max_hp, player.defense, player.power, player.keys_found,
+                writer.item(player.equipped_weapon), writer.item(inventory.weapon))
+    for section in (inventory.keys, inventory.food, inventory.general_items):
+        writer.indices([writer.item(item) for item in section])
+
+    stats = player.statistics
+    writer.pack(STATISTICS, stats.enemies_killed, stats.items_picked, stats.food_eaten,
+                stats.attacks_made, stats.damage_taken, stats.keys_found)
+    writer.indices(sorted(stats.floors_visited))
+    writer.pack(COUNT, writer.string(session.message))
+
+    for name in RandomStreams.NAMES:
+        writer.body += _pack_rng_state(getattr(session.rng, name).getstate())
+    remaining, last = session.riddles.getstate()
+    writer.indices(remaining)
+    writer.pack(COUNT, last & NONE)
+
+    # Таблицы строк и предметов известны только после обхода состояния, поэтому идут перед телом
+    tables = bytearray()
+    item_records = [_item_record(item, writer) for item in writer.items]
+    encoded = [text.encode('utf-8') for text in writer.strings]
+    tables += COUNT.pack(len(encoded))
+    for raw in encoded:
+        tables += COUNT.pack(len(raw)) + raw
+    tables += COUNT.pack(len(item_records))
+    tables += b''.join(item_records)
+
+    size = HEADER.size + len(tables) + len(writer.body)
+    return b''.join((HEADER.pack(MAGIC, VERSION, session.seed, session.turn, session.key_floor, size),
+                     tables, writer.body))
+
+
+def deserialize(data: bytes, path: str = "<bytes>", prefetch: bool = True) -> GameSession:
+    """GameSession из содержимого файла сохранения (path - только для сообщений об ошибках).
+    prefetch=False - соседние этажи не строятся в фоне (как в GameSession)."""
+    reader = _Reader(data)
+    try:
+        magic, version, seed, turn, key_floor, size = reader.unpack(HEADER)
+    except struct.error:
+        raise SaveError(f"{path}: файл слишком короткий")
+    if magic != MAGIC or version != VERSION:
+        raise SaveError(f"{path}: не сохранение версии {VERSION}")
+    if size != len(data):
+        raise SaveError(f"{path}: файл обрезан или поврежден")
+
+    strings = [bytes(reader.raw(reader.count())).decode('utf-8') for _ in range(reader.count())]
+    # Каждая запись - отдельный предмет, но одинаковые записи делят неизменяемый прототип
+    prototypes: Dict[tuple, ItemPrototype] = {}
+    items = []
+    for _ in range(reader.count()):
+        record = reader.unpack(ITEM)
+        kind, name, glyph, color, value = record
+        item = _make_item(kind, strings[name], glyph, strings[color], value)
+        item.prototype = prototypes.setdefault(record, item.prototype)
+        items.append(item)
+
+    width, height, num_floors, max_rooms, min_room_size, max_room_size, map_seed = reader.unpack(GENERATOR)
+    generator = MapGenerator(width=width, height=height, num_floors=num_floors, max_rooms=max_rooms,
+                             min_room_size=min_room_size, max_room_size=max_room_size, seed=map_seed)
+    dungeon = Dungeon(generator, prefetch=prefetch)
+    for floor_num in range(reader.count()):
+        if reader.unpack(FLAG)[0]:
+            dungeon.set_floor(floor_num, _read_floor(reader))
+
+    loaded = [_read_enemy(reader, strings, items) for _ in range(reader.count())]
+    enemies = EnemyIndex(loaded, EnemyStore())
+    num_awake = reader.count()
+    awake = loaded[len(loaded) - num_awake:]
+    map_items = ItemIndex()
+    for _ in range(reader.count()):
+        item, floor, x, y = reader.unpack(MAP_ITEM)
+        map_items.add(items[item], x, y, floor)
+
+    (name, x, y, floor, hp, max_hp, defense, power, keys_found,
+     equipped, weapon) = reader.unpack(PLAYER)
+    player = Player(x, y, strings[name])
+    player.current_floor = floor
+    player.hp, player.max_hp, player.defense, player.power = hp, max_hp, defense, power
+    player.keys_found = keys_found
+    player.equipped_weapon = items[equipped] if equipped != NONE else None
+    inventory = player.inventory
+    inventory.weapon = items[weapon] if weapon != NONE else None
+    inventory.keys = [items[i] for i in reader.indices()]
+    inventory.food = [items[i] for i in reader.indices()]
+    inventory.general_items = [items[i] for i in reader.indices()]
+
+    stats = player.statistics
+    (stats.enemies_killed, stats.items_picked, stats.food_eaten,
+     stats.attacks_made, stats.damage_taken, stats.keys_found) = reader.unpack(STATISTICS)
+    stats.floors_visited = set(reader.indices())
+    message = reader.count()
+
+    rng = RandomStreams(seed)
+    rng.setstate({name: _unpack_rng_state(reader.unpack(RNG_STATE)) for name in RandomStreams.NAMES})
+    riddles = RiddleDeck(content.riddles(), rng.riddles)
+    remaining = reader.indices()
+    last = reader.count()
+    riddles.setstate((remaining, -1 if last == NONE else last))
+
+    return GameSession.restore(generator, dungeon, player, enemies, map_items, rng, key_floor,
+                               turn=turn, message=strings[message] if message != NONE else "", awake=awake,
+                               riddles=riddles)
@@ -0,0 +1,119 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+from entities import Enemy, Player
+from map_generator import Floor
+from spatial_index import EnemyIndex
+
+
+"""scheduler.py - планировщик ходов врагов
+EnemyScheduler - делит врагов на спящих (по этажам и комнатам) и бодрствующих,
+ходы делают только бодрствующие враги"""
+
+
+CORRIDOR = -1
+
+
+class EnemyScheduler:
+    """Будит врагов в комнатах и коридорах, которые видит игрок, и усыпляет ушедших далеко."""
+
+    def __init__(self, dungeon: List[Floor], enemies: EnemyIndex, sleep_radius: int = 16):
+        self.dungeon = dungeon
+        self.enemies = enemies
+        self.sleep_radius = sleep_radius
+        self._awake: Dict[Enemy, None] = {}
+        self._awake_floor: Optional[int] = None
+        # этаж -> номер комнаты (или CORRIDOR) -> спящие враги
+        self._sleeping: Dict[int, Dict[int, Dict[Enemy, None]]] = {}
+        self._room_maps: Dict[int, array] = {}
+        for enemy in enemies:
+            self.add(enemy)
+
+    def add(self, enemy: Enemy) -> None:
+        """Регистрирует нового врага (он начинает спящим)."""
+        self._put_to_sleep(enemy)
+
+    def awake(self) -> List[Enemy]:
+        """Бодрствующие враги на текущем этаже игрока."""
+        return list(self._awake)
+
+    def snapshot(self) -> Tuple[List[Enemy], List[Enemy]]:
+        """Спящие враги (по этажам и комнатам) и бодрствующие - в том порядке, в котором
+        планировщик их будит и двигает. Нужен сохранению, чтобы после загрузки ходы шли так же."""
+        sleeping = [enemy for rooms in self._sleeping.values() for room in rooms.values() for enemy in room
+                    if enemy in self.enemies]
+        return sleeping, [enemy for enemy in self._awake if enemy in self.enemies]
+
+    def restore_awake(self, floor_idx: int, awake: List[Enemy]) -> None:
+        """Будит сохраненных бодрствующих врагов этажа floor_idx в сохраненном порядке."""
+        self._awake_floor = floor_idx
+        for enemy in awake:
+            room_id = self._room_map(enemy.current_floor)[enemy.y * self.dungeon[enemy.current_floor].width + enemy.x]
+            self._sleeping.get(enemy.current_floor, {}).get(room_id, {}).pop(enemy, None)
+            self._wake(enemy)
+
+    def update(self, player: Player) -> List[Enemy]:
+        """Обновляет множества спящих и бодрствующих после хода игрока и возвращает тех, кто ходит."""
+        floor_idx = player.current_floor
+        if floor_idx != self._awake_floor:
+            for enemy in list(self._awake):
+                self._put_to_sleep(enemy)
+            self._awake.clear()
+            self._awake_floor = floor_idx
+
+        sleeping = self._sleeping.get(floor_idx)
+        if sleeping:
+            self._wake_visible(floor_idx, sleeping)
+
+        radius = self.sleep_radius
+        for enemy in list(self._awake):
+            if enemy.is_dead() or enemy not in self.enemies:
+                del self._awake[enemy]
+            elif max(abs(enemy.x - player.x), abs(enemy.y - player.y)) > radius:
+                del self._awake[enemy]
+                self._put_to_sleep(enemy)
+        return list(self._awake)
+
+    def _wake_visible(self, floor_idx: int, sleeping: Dict[int, Dict[Enemy, None]]) -> None:
+        # Будит всех спящих в комнатах, часть которых видна игроку,
+        # и спящих в коридорах, если видна их клетка
+        floor = self.dungeon[floor_idx]
+        room_map = self._room_map(floor_idx)
+        corridor = sleeping.get(CORRIDOR)
+        enemy_cells = self.enemies.cells(floor_idx)
+        rooms = set()
+        for index in floor.visible:
+            room_id = room_map[index]
+            if room_id != CORRIDOR:
+                rooms.add(room_id)
+            elif corridor:
+                here = enemy_cells.get((index % floor.width, index // floor.width))
+                if here:
+                    for enemy in here:
+                        if enemy in corridor:
+                            del corridor[enemy]
+                            self._wake(enemy)
+        for room_id in rooms:
+            for enemy in sleeping.pop(room_id, ()):
+                self._wake(enemy)
+
+    def _wake(self, enemy: Enemy) -> None:
+        if not enemy.is_dead():
+            self._awake[enemy] = None
+
+    def _put_to_sleep(self, enemy: Enemy) -> None:
+        room_id = self._room_map(enemy.current_floor)[enemy.y * self.dungeon[enemy.current_floor].width + enemy.x]
+        self._sleeping.setdefault(enemy.current_floor, {}).setdefault(room_id, {})[enemy] = None
+
+    def _room_map(self, floor_idx: int) -> array:
+        # Номер комнаты для каждой клетки этажа (CORRIDOR вне комнат), строится один раз
+        room_map = self._room_maps.get(floor_idx)
+        if room_map is None:
+            floor = self.dungeon[floor_idx]
+            room_map = array('h', [CORRIDOR]) * (floor.width * floor.height)
+            for room_id, room in enumerate(floor.rooms):
+                span = array('h', [room_id]) * (room.x2 - room.x1 + 1)
+                for y in range(room.y1, room.y2 + 1):
+                    row = y * floor.width
+                    room_map[row + room.x1:row + room.x2 + 1] = span
+            self._room_maps[floor_idx] = room_map
+        return room_map
@@ -0,0 +1,233 @@
+from math import hypot
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from entities import Enemy, Item
+from components import EnemyStore
+
+
+"""spatial_index.py - пространственные индексы сущностей
+EnemyIndex - враги, сгруппированные по этажу и клетке (x, y)
+ItemIndex - предметы на карте, сгруппированные по этажу и клетке (x, y)
+RoomIndex - сеточный индекс комнат для генератора (пересечения и ближайший центр)"""
+
+
+Cell = Tuple[int, int]
+
+AROUND = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+class EnemyIndex:
+    """Хранит врагов и позволяет находить их по этажу и координатам без перебора всего списка.
+
+    store - необязательное столбцовое хранилище (components.EnemyStore): враги индекса
+    держат в нем свое состояние, пока находятся в индексе."""
+
+    def __init__(self, enemies: Iterable[Enemy] = (), store: Optional[EnemyStore] = None):
+        self.store = store
+        self._by_floor: Dict[int, Dict[Enemy, None]] = {}
+        self._cells: Dict[int, Dict[Cell, List[Enemy]]] = {}
+        self._count = 0
+        for enemy in enemies:
+            self.append(enemy)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Enemy]:
+        for floor_enemies in self._by_floor.values():
+            yield from floor_enemies
+
+    def __contains__(self, enemy: Enemy) -> bool:
+        return enemy in self._by_floor.get(enemy.current_floor, ())
+
+    def append(self, enemy: Enemy) -> None:
+        """Добавляет врага в индекс и подписывает индекс на его перемещения."""
+        self._by_floor.setdefault(enemy.current_floor, {})[enemy] = None
+        self._cells.setdefault(enemy.current_floor, {}).setdefault((enemy.x, enemy.y), []).append(enemy)
+        enemy.position_index = self
+        if self.store is not None:
+            self.store.add(enemy)
+        self._count += 1
+
+    def remove(self, enemy: Enemy) -> None:
+        """Удаляет врага из индекса (например, после смерти)."""
+        del self._by_floor[enemy.current_floor][enemy]
+        self._unplace(enemy, enemy.x, enemy.y)
+        enemy.position_index = None
+        if self.store is not None:
+            self.store.remove(enemy)
+        self._count -= 1
+
+    def moved(self, enemy: Enemy, old_x: int, old_y: int) -> None:
+        """Вызывается из Character.move после смены координат врага."""
+        self._unplace(enemy, old_x, old_y)
+        self._cells[enemy.current_floor].setdefault((enemy.x, enemy.y), []).append(enemy)
+
+    def _unplace(self, enemy: Enemy, x: int, y: int) -> None:
+        cells = self._cells[enemy.current_floor]
+        here = cells[(x, y)]
+        here.remove(enemy)
+        if not here:
+            del cells[(x, y)]
+
+    def at(self, floor: int, x: int, y: int) -> Optional[Enemy]:
+        """Возвращает врага в клетке (x, y) или None."""
+        here = self._cells.get(floor, {}).get((x, y))
+        return here[0] if here else None
+
+    def cells(self, floor: int) -> Dict[Cell, List[Enemy]]:
+        """Словарь занятых клеток этажа: (x, y) -> враги в этой клетке."""
+        return self._cells.get(floor, {})
+
+    def on_floor(self, floor: int) -> List[Enemy]:
+        """Список врагов на этаже."""
+        return list(self._by_floor.get(floor, ()))
+
+    def near(self, floor: int, x: int, y: int, radius: float = 1.5) -> List[Tuple[Enemy, float]]:
+        """Пары (враг, расстояние) для врагов из around() не дальше radius от (x, y);
+        со столбцовым хранилищем расстояния считаются одним проходом."""
+        candidates = self.around(floor, x, y)
+        if self.store is not None:
+            return self.store.within(candidates, x, y, radius)
+        pairs = [(enemy, hypot(enemy.x - x, enemy.y - y)) for enemy in candidates]
+        return [pair for pair in pairs if pair[1] <= radius]
+
+    def around(self, floor: int, x: int, y: int) -> List[Enemy]:
+        """Враги в клетке (x, y) и восьми соседних."""
+        cells = self._cells.get(floor)
+        if not cells:
+            return []
+        found = []
+        for dx, dy in AROUND:
+            here = cells.get((x + dx, y + dy))
+            if here:
+                found.extend(here)
+        return found
+
+
+class ItemIndex:
+    """Предметы, лежащие на карте, сгруппированные по этажу и клетке."""
+
+    def __init__(self, items: Iterable[Tuple[Item, int, int, int]] = ()):
+        self._cells: Dict[int, Dict[Cell, List[Item]]] = {}
+        self._count = 0
+        for entry in items:
+            self.append(entry)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Tuple[Item, int, int, int]]:
+        for floor, cells in self._cells.items():
+            for (x, y), stack in cells.items():
+                for item in stack:
+                    yield item, x, y, floor
+
+    def append(self, entry: Tuple[Item, int, int, int]) -> None:
+        """Добавляет запись в старом формате (Item, x, y, floor)."""
+        item, x, y, floor = entry
+        self.add(item, x, y, floor)
+
+    def add(self, item: Item, x: int, y: int, floor: int) -> None:
+        """Кладет предмет на клетку (x, y) этажа floor."""
+        self._cells.setdefault(floor, {}).setdefault((x, y), []).append(item)
+        self._count += 1
+
+    def at(self, floor: int, x: int, y: int) -> Optional[Item]:
+        """Верхний предмет в клетке (x, y) или None."""
+        stack = self._cells.get(floor, {}).get((x, y))
+        return stack[-1] if stack else None
+
+    def take(self, floor: int, x: int, y: int) -> Optional[Item]:
+        """Забирает верхний предмет из клетки (x, y)."""
+        cells = self._cells.get(floor)
+        if not cells:
+            return None
+        stack = cells.get((x, y))
+        if not stack:
+            return None
+        item = stack.pop()
+        if not stack:
+            del cells[(x, y)]
+        self._count -= 1
+        return item
+
+    def cells(self, floor: int) -> Dict[Cell, List[Item]]:
+        """Словарь клеток этажа с предметами: (x, y) -> стопка предметов."""
+        return self._cells.get(floor, {})
+
+
+class RoomIndex:
+    """Комнаты, разложенные по квадратным ячейкам сетки размера cell_size."""
+
+    def __init__(self, cell_size: int):
+        self.cell_size = cell_size
+        self._rects: Dict[Cell, list] = {}    # ячейка -> комнаты, прямоугольник которых ее задевает
+        self._centers: Dict[Cell, list] = {}  # ячейка -> комнаты, центр которых в ней лежит
+        self._bounds: Optional[List[int]] = None  # [min_cx, min_cy, max_cx, max_cy] занятых ячеек центров
+
+    def __len__(self) -> int:
+        return sum(len(rooms) for rooms in self._centers.values())
+
+    def _cells_of(self, room) -> Iterator[Cell]:
+        size = self.cell_size
+        for cx in range(room.x1 // size, room.x2 // size + 1):
+            for cy in range(room.y1 // size, room.y2 // size + 1):
+                yield cx, cy
+
+    def add(self, room) -> None:
+        for cell in self._cells_of(room):
+            self._rects.setdefault(cell, []).append(room)
+        x, y = room.center
+        cx, cy = x // self.cell_size, y // self.cell_size
+        self._centers.setdefault((cx, cy), []).append(room)
+        if self._bounds is None:
+            self._bounds = [cx, cy, cx, cy]
+        else:
+            bounds = self._bounds
+            bounds[0], bounds[1] = min(bounds[0], cx), min(bounds[1], cy)
+            bounds[2], bounds[3] = max(bounds[2], cx), max(bounds[3], cy)
+
+    def intersects(self, room) -> bool:
+        """Пересекается ли room (по правилам Room.intersects) хотя бы с одной комнатой индекса."""
+        for cell in self._cells_of(room):
+            for other in self._rects.get(cell, ()):
+                if room.intersects(other):
+                    return True
+        return False
+
+    def nearest(self, x: int, y: int, accept: Optional[Callable[[object], bool]] = None):
+        """Комната с ближайшим к (x, y) центром среди тех, для которых accept(room) истинно."""
+        if self._bounds is None:
+            return None
+        size = self.cell_size
+        cx, cy = x // size, y // size
+        min_cx, min_cy, max_cx, max_cy = self._bounds
+        max_ring = max(abs(cx - min_cx), abs(cx - max_cx), abs(cy - min_cy), abs(cy - max_cy))
+        best = None
+        best_distance = None
+        for ring in range(max_ring + 1):
+            for cell in _ring(cx, cy, ring):
+                for room in self._centers.get(cell, ()):
+                    if accept is not None and not accept(room):
+                        continue
+                    rx, ry = room.center
+                    distance = (rx - x) ** 2 + (ry - y) ** 2
+                    if best_distance is None or distance < best_distance:
+                        best, best_distance = room, distance
+            # Центры в следующих кольцах не ближе ring * size
+            if best_distance is not None and best_distance <= (ring * size) ** 2:
+                break
+        return best
+
+
+def _ring(cx: int, cy: int, ring: int) -> Iterator[Cell]:
+    # Ячейки на расстоянии Чебышёва ring от (cx, cy)
+    if ring == 0:
+        yield cx, cy
+        return
+    for dx in range(-ring, ring + 1):
+        yield cx + dx, cy - ring
+        yield cx + dx, cy + ring
+    for dy in range(-ring + 1, ring):
+        yield cx - ring, cy + dy
+        yield cx + ring, cy + dy
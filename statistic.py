@@ -2,7 +2,8 @@ from colorama import Fore, Style, Back
 
 
 """statistic.py - cтатистика игрока
-class Statistics - отслеживает достижения игрока (убийства, предметы и тд)"""
+class Statistics - отслеживает достижения игрока (убийства, предметы и тд);
+с подключенным журналом (attach_telemetry) каждое событие еще и дописывается в telemetry.TelemetryLog"""
 
 class Statistics:
     """Класс для отслеживания статистики игрока."""
@@ -15,27 +16,52 @@ class Statistics:
         self.attacks_made = 0
         self.damage_taken = 0
         self.keys_found = 0
+        self.telemetry = None  # журнал событий, см. attach_telemetry
+        self._where = None
+
+    def attach_telemetry(self, telemetry, where):
+        """Подключает журнал событий. where() возвращает (ход, этаж, x, y) на момент события."""
+        self.telemetry = telemetry
+        self._where = where
+
+    def _emit(self, event: str, value: int = 1):
+        turn, floor, x, y = self._where()
+        self.telemetry.emit(event, value, turn, floor, x, y)
     
     def record_enemy_killed(self):
         self.enemies_killed += 1
+        if self.telemetry is not None:
+            self._emit('enemy_killed')
     
     def record_item_picked(self):
         self.items_picked += 1
+        if self.telemetry is not None:
+            self._emit('item_picked')
     
     def record_food_eaten(self):
         self.food_eaten += 1
+        if self.telemetry is not None:
+            self._emit('food_eaten')
     
     def record_floor_visited(self, floor: int):
         self.floors_visited.add(floor)
+        if self.telemetry is not None:
+            self._emit('floor_visited', floor)
     
     def record_attack(self):
         self.attacks_made += 1
+        if self.telemetry is not None:
+            self._emit('attack')
     
     def record_damage_taken(self, damage: int):
         self.damage_taken += damage
+        if self.telemetry is not None:
+            self._emit('damage_taken', damage)
     
     def record_key_found(self):
         self.keys_found += 1
+        if self.telemetry is not None:
+            self._emit('key_found')
     
     def _generate_display(self, color=Fore.RED, padding="    "):
         return (
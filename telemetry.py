@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+"""telemetry.py - журнал игровых событий
+Запись: TelemetryLog - дописывает события Statistics (убийства, урон, этажи и т.п.) с номером
+хода, этажом и позицией игрока в файл JSONL; одна строка - одно событие
+Чтение: read_events() - построчный поток событий из многих журналов, aggregate() - сводка по
+ним без загрузки файлов в память.
+Запуск: python telemetry.py журнал.jsonl [...] [--output сводка.json]"""
+
+
+RUN_START = 'run_start'
+RUN_END = 'run_end'
+BUFFER_SIZE = 64 * 1024
+
+
+class TelemetryLog:
+    """Буферизованный журнал одной игры, открытый на дозапись.
+
+    Строки собираются форматированием без json.dumps и копятся в буфере файла; на диск они
+    уходят по мере заполнения буфера, а fsync делается один раз - в close()."""
+
+    def __init__(self, path: str, seed: Optional[int] = None, buffer_size: int = BUFFER_SIZE):
+        self.path = path
+        self.run_id = uuid.uuid4().hex
+        self._file = open(path, 'a', encoding='utf-8', buffering=buffer_size)
+        self._prefix = '{"run":"%s","time":%%.3f,"event":"' % self.run_id
+        self.emit(RUN_START, seed if seed is not None else 0, 0, 0, 0, 0)
+
+    def emit(self, event: str, value: int, turn: int, floor: int, x: int, y: int) -> None:
+        self._file.write(self._prefix % time.time() + event +
+                         '","value":%d,"turn":%d,"floor":%d,"x":%d,"y":%d}\n' % (value, turn, floor, x, y))
+
+    def close(self, turn: int = 0) -> None:
+        """Пишет конец игры, сбрасывает буфер и дожидается записи на диск."""
+        if self._file is None:
+            return
+        self.emit(RUN_END, 0, turn, 0, 0, 0)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+
+def read_events(paths: Iterable[str], errors: Optional[List[str]] = None) -> Iterator[dict]:
+    """События журналов по одному, в порядке файлов и строк.
+
+    Оборванные или испорченные строки (например, последняя строка после аварийного выхода)
+    пропускаются; если передан список errors, в него добавляется 'файл:строка'."""
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    if errors is not None:
+                        errors.append(f"{path}:{line_num}")
+
+
+def aggregate(events: Iterable[dict]) -> dict:
+    """Сводка по потоку событий: число игр, счетчики и суммы по видам событий и этажам, ходы."""
+    kinds: Dict[str, Dict[str, int]] = {}
+    floors: Dict[int, Dict[str, int]] = {}
+    runs = finished = total_turns = max_turns = 0
+    for event in events:
+        kind = event.get('event')
+        if kind == RUN_START:
+            runs += 1
+            continue
+        if kind == RUN_END:
+            finished += 1
+            turn = event.get('turn', 0)
+            total_turns += turn
+            max_turns = max(max_turns, turn)
+            continue
+        counters = kinds.get(kind)
+        if counters is None:
+            counters = kinds[kind] = {'count': 0, 'total': 0}
+        counters['count'] += 1
+        counters['total'] += event.get('value', 1)
+        by_floor = floors.setdefault(event.get('floor', 0), {})
+        by_floor[kind] = by_floor.get(kind, 0) + 1
+    return {
+        'runs': runs,
+        'finished_runs': finished,
+        'turns': {'total': total_turns, 'max': max_turns,
+                  'mean': total_turns / finished if finished else 0.0},
+        'events': dict(sorted(kinds.items())),
+        'floors': {str(floor): floors[floor] for floor in sorted(floors)},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Сводка по журналам игровых событий")
+    parser.add_argument('paths', nargs='+', help="файлы журналов (JSONL)")
+    parser.add_argument('--output', default=None, help="записать сводку в файл вместо вывода")
+    args = parser.parse_args(argv)
+
+    errors: List[str] = []
+    summary = aggregate(read_events(args.paths, errors))
+    summary['bad_lines'] = len(errors)
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
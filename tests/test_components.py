@@ -0,0 +1,59 @@
+from math import hypot
+
+import glyphs
+from components import AGGRAVATED, HOSTILE, NO_FLOOR, EnemyStore
+from entities import HostileEnemy, NeutralEnemy
+
+
+def dog(x, y):
+    return HostileEnemy(x, y, glyphs.DOG, "Злая собака", hp=20, defense=1, power=3, view_range=8)
+
+
+def guard(x, y):
+    return NeutralEnemy(x, y, glyphs.DOG, "Охранник", hp=30, defense=2, power=4)
+
+
+def test_state_survives_add_mutate_remove():
+    store = EnemyStore()
+    enemy = guard(3, 4)
+    enemy.current_floor = 2
+    store.add(enemy)
+    assert store.x[enemy._row] == 3 and store.current_floor[enemy._row] == 2
+    assert store.flags[enemy._row] == 0
+
+    enemy.x, enemy.y, enemy.hp = 7, 8, 12
+    enemy.aggravated = True
+    assert (store.x[enemy._row], store.y[enemy._row], store.hp[enemy._row]) == (7, 8, 12)
+    assert store.flags[enemy._row] & AGGRAVATED
+
+    store.remove(enemy)
+    assert enemy._store is None
+    assert (enemy.x, enemy.y, enemy.hp, enemy.current_floor, enemy.aggravated) == (7, 8, 12, 2, True)
+    enemy.hp = 5  # снова обычный слот
+    assert enemy.hp == 5 and len(store) == 0
+
+
+def test_freed_row_is_reused():
+    store = EnemyStore()
+    first, second = dog(1, 1), dog(2, 2)
+    store.add(first)
+    store.add(second)
+    row = first._row
+    store.remove(first)
+    assert store.current_floor[row] == NO_FLOOR and store.objects[row] is None
+
+    third = dog(9, 9)
+    store.add(third)
+    assert third._row == row and store.objects[row] is third
+    assert (third.x, third.y) == (9, 9) and store.flags[row] == HOSTILE
+    assert (second.x, second.y) == (2, 2)
+
+
+def test_distances_and_within():
+    store = EnemyStore()
+    enemies = [dog(0, 0), dog(3, 4), dog(10, 0)]
+    for enemy in enemies:
+        store.add(enemy)
+    assert store.distances(0, 0) == [0.0, 5.0, 10.0]
+    assert store.distances(1, 1, [enemies[2]._row]) == [hypot(9, 1)]
+    assert store.within(enemies, 0, 0, 5) == [(enemies[0], 0.0), (enemies[1], 5.0)]
@@ -0,0 +1,45 @@
+import random
+
+import content
+from content import RiddleDeck
+from game_session import GameSession
+from save_game import deserialize, serialize
+
+
+def riddles(count):
+    return [{'question': f"Загадка {i}", 'options': ["да", "нет"], 'answer': 0} for i in range(count)]
+
+
+def test_no_repeats_until_reshuffle():
+    deck = RiddleDeck(riddles(7), random.Random(1))
+    for _ in range(5):
+        round_ = [deck.draw()['question'] for _ in range(len(deck))]
+        assert len(set(round_)) == len(deck)
+
+
+def test_last_riddle_does_not_open_the_next_round():
+    deck = RiddleDeck(riddles(3), random.Random(2))
+    last = None
+    for _ in range(200):
+        first = deck.draw()
+        assert first is not last
+        deck.draw()
+        last = deck.draw()
+
+
+def test_empty_deck_draws_nothing():
+    assert RiddleDeck([], random.Random(1)).draw() is None
+
+
+def test_deck_survives_save_and_load():
+    session = GameSession(seed=5, prefetch=False)
+    for _ in range(len(session.riddles) // 2 + 1):
+        session.riddles.draw()
+    loaded = deserialize(serialize(session), prefetch=False)
+    assert loaded.riddles.getstate() == session.riddles.getstate()
+    expected = [session.riddles.draw() for _ in range(len(session.riddles) * 2)]
+    assert [loaded.riddles.draw() for _ in range(len(loaded.riddles) * 2)] == expected
+
+
+def test_repository_loads_riddles_once():
+    assert content.riddles() is content.riddles()
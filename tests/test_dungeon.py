@@ -0,0 +1,23 @@
+from dungeon import Dungeon
+from map_generator import MapGenerator
+
+from test_map_generator import snapshot
+
+
+def test_lazy_floors_match_eager_generation():
+    eager = MapGenerator(80, 24, 4, seed=5).generate_map()
+    dungeon = Dungeon(MapGenerator(80, 24, 4, seed=5), prefetch=False)
+    # Этажи строятся не по порядку: результат не должен зависеть от порядка посещения
+    lazy = [dungeon[floor_num] for floor_num in (2, 0, 3, 1)]
+    assert sorted(dungeon.generated()) == [0, 1, 2, 3]
+    assert snapshot(lazy) == snapshot([eager[2], eager[0], eager[3], eager[1]])
+
+
+def test_prefetched_floors_match_eager_generation():
+    eager = MapGenerator(80, 24, 3, seed=5).generate_map()
+    dungeon = Dungeon(MapGenerator(80, 24, 3, seed=5))
+    try:
+        dungeon.prefetch_around(0)
+        assert snapshot(dungeon) == snapshot(eager)
+    finally:
+        dungeon.close()
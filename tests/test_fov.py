@@ -0,0 +1,51 @@
+from fov import compute_fov
+from map_generator import BLOCKING, Floor, Tile
+
+
+def open_floor(width, height):
+    floor = Floor(width, height)
+    floor.tile_types[:] = bytes([Tile.FLOOR]) * (width * height)
+    return floor
+
+
+def visible_cells(floor, x, y, radius):
+    visible = compute_fov(floor.tile_types, floor.width, floor.height, x, y, radius, BLOCKING)
+    return {(index % floor.width, index // floor.width) for index in visible}
+
+
+def test_radius_is_respected():
+    floor = open_floor(21, 21)
+    visible = visible_cells(floor, 10, 10, 5)
+    assert (10, 10) in visible
+    assert (15, 10) in visible and (16, 10) not in visible
+    assert (13, 14) in visible      # 3² + 4² = 5²
+    assert (14, 14) not in visible  # 4² + 4² > 5²
+    assert all((x - 10) ** 2 + (y - 10) ** 2 <= 25 for x, y in visible)
+
+
+def test_walls_block_sight():
+    floor = open_floor(21, 21)
+    for y in range(21):
+        floor.set_tile(12, y, Tile.WALL)
+    visible = visible_cells(floor, 10, 10, 8)
+    assert (11, 10) in visible
+    assert (12, 10) in visible  # сама стена видна
+    assert not any(x > 12 for x, _ in visible)
+
+
+def test_light_passes_through_a_gap():
+    floor = open_floor(21, 21)
+    for y in range(21):
+        if y != 10:
+            floor.set_tile(12, y, Tile.WALL)
+    visible = visible_cells(floor, 10, 10, 8)
+    assert (16, 10) in visible
+    assert (16, 16) not in visible
+
+
+def test_update_fov_marks_cells_explored():
+    floor = open_floor(21, 21)
+    floor.update_fov(10, 10, radius=3)
+    assert floor.is_visible(12, 10) and floor.is_explored(12, 10)
+    floor.update_fov(3, 3, radius=3)
+    assert not floor.is_visible(12, 10) and floor.is_explored(12, 10)
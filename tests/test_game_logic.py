@@ -0,0 +1,24 @@
+from entities import make_item
+from game_session import GameSession
+
+
+def breads(player):
+    return [item for item in player.inventory.get_all_items() if item.name == make_item('bread').name]
+
+
+def test_eating_one_bread_keeps_the_other():
+    session = GameSession(seed=1, prefetch=False)
+    player = session.player
+    for item in list(player.inventory.food):
+        player.inventory.remove_item(item)
+    player.inventory.add_item(make_item('bread'))
+    player.inventory.add_item(make_item('bread'))
+    player.hp = 1
+    bread = breads(player)[0]
+
+    session.step('use', player.inventory.get_all_items().index(bread))
+
+    assert len(breads(player)) == 1
+    healed = player.hp - 1
+    assert healed > 0
+    assert session.message == f"Вы съели {bread.name} и восстановили {healed} здоровья."
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from input_handler import DOWN, ESC, LEFT, RESIZE, RIGHT, UP, InputSession, KeyDecoder
+
+
+def test_plain_keys_are_lowercased():
+    assert KeyDecoder().feed(b'wAsD') == ['w', 'a', 's', 'd']
+
+
+def test_arrow_sequences():
+    decoder = KeyDecoder()
+    assert decoder.feed(b'\x1b[A\x1b[B\x1bOC\x1b[D') == [UP, DOWN, RIGHT, LEFT]
+
+
+def test_sequence_split_between_reads():
+    decoder = KeyDecoder()
+    assert decoder.feed(b'\x1b') == []
+    assert decoder.pending_escape()
+    assert decoder.feed(b'[') == []
+    assert decoder.feed(b'A') == [UP]
+
+
+def test_unknown_csi_is_dropped_whole():
+    # Например, F5 (ESC [ 1 5 ~): ни одна цифра не должна стать ходом
+    assert KeyDecoder().feed(b'\x1b[15~w') == ['w']
+
+
+def test_lone_escape_is_flushed_as_esc():
+    decoder = KeyDecoder()
+    assert decoder.feed(b'\x1b') == []
+    assert decoder.flush() == [ESC]
+    assert not decoder.pending_escape()
+
+
+def test_alt_key_gives_escape_and_key():
+    assert KeyDecoder().feed(b'\x1bx') == [ESC, 'x']
+
+
+def test_utf8_split_between_reads():
+    decoder = KeyDecoder()
+    data = 'Ж'.encode('utf-8')
+    assert decoder.feed(data[:1]) == []
+    assert decoder.feed(data[1:]) == ['ж']
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="в Windows ввод идет через msvcrt")
+def test_wake_interrupts_waiting_for_key():
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(read_fd, 'rb', buffering=0) as stream, InputSession(stream) as keyboard:
+        keyboard.wake()
+        assert keyboard.get_key(timeout=1.0) == RESIZE
+        os.write(write_fd, b'\x1b[Aq')
+        assert [keyboard.get_key(), keyboard.get_key()] == [UP, 'q']
+    os.close(write_fd)
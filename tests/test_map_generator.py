@@ -0,0 +1,61 @@
+from collections import deque
+
+import pytest
+
+from map_generator import Floor, MapGenerator, Room
+from spatial_index import RoomIndex
+
+
+def snapshot(floors):
+    return [(bytes(floor.tile_types), floor.stairs_up, floor.stairs_down,
+             [(room.x1, room.y1, room.x2, room.y2) for room in floor.rooms]) for floor in floors]
+
+
+def test_same_seed_gives_same_floors():
+    first = MapGenerator(80, 24, 3, seed=3).generate_map()
+    second = MapGenerator(80, 24, 3, seed=3).generate_map()
+    assert snapshot(first) == snapshot(second)
+
+
+def test_process_pool_matches_serial_generation():
+    serial = MapGenerator(120, 40, 4, seed=7).generate_map()
+    parallel = MapGenerator(120, 40, 4, seed=7).generate_map(workers=2)
+    assert snapshot(serial) == snapshot(parallel)
+
+
+def reachable_from(floor, start):
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+            cell = (x + dx, y + dy)
+            if cell not in seen and not floor.is_blocked(*cell):
+                seen.add(cell)
+                queue.append(cell)
+    return seen
+
+
+@pytest.mark.parametrize('width, height, max_rooms', [(80, 24, 15), (120, 60, 200), (200, 80, 600)])
+def test_every_walkable_tile_is_reachable(width, height, max_rooms):
+    for seed in range(40):
+        floor = MapGenerator(width, height, 1, max_rooms=max_rooms, seed=seed).generate_floor(0)
+        reached = reachable_from(floor, floor.rooms[0].center)
+        walkable = {(x, y) for y in range(floor.height) for x in range(floor.width) if not floor.is_blocked(x, y)}
+        assert walkable == reached, f"seed {seed}"
+
+
+def test_unreachable_room_raises():
+    generator = MapGenerator(40, 20, 1, seed=1)
+    floor = Floor(40, 20)
+    room_index = RoomIndex(generator.max_room_size + 1)
+    for room in (Room(3, 3, 6, 6), Room(25, 8, 6, 6)):
+        generator._create_room(floor, room)
+        floor.rooms.append(room)
+        room_index.add(room)
+    # Коридоры не прокладываются - вторая комната остается отрезанной
+    generator._connect_rooms = lambda *args: []
+    generator._create_horizontal_tunnel = lambda *args: []
+    generator._create_vertical_tunnel = lambda *args: []
+    with pytest.raises(RuntimeError):
+        generator._flood_check(floor, room_index)
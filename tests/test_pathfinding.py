@@ -0,0 +1,47 @@
+from map_generator import Floor, Tile
+from pathfinding import DistanceMap, distance_map_to
+
+
+def corridor_floor():
+    # Две половины разделены стеной x = 5, проход только внизу (y = 5)
+    floor = Floor(11, 7)
+    floor.tile_types[:] = bytes([Tile.FLOOR]) * (11 * 7)
+    for y in range(5):
+        floor.set_tile(5, y, Tile.WALL)
+    return floor
+
+
+def follow(distance_map, x, y, limit=50):
+    path = [(x, y)]
+    for _ in range(limit):
+        step = distance_map.step_from(x, y)
+        if step is None:
+            break
+        x, y = x + step[0], y + step[1]
+        path.append((x, y))
+    return path
+
+
+def test_step_from_goes_around_the_wall():
+    floor = corridor_floor()
+    distance_map = DistanceMap(floor, 8, 1)
+    path = follow(distance_map, 2, 1)
+    assert path[-1] == (8, 1)
+    assert (5, 5) in path
+    assert all(not floor.is_blocked(x, y) for x, y in path)
+    # Кратчайший путь: вниз к проходу, через него и обратно вверх
+    assert len(path) - 1 == distance_map.distance(2, 1) == 14
+
+
+def test_target_beyond_max_distance_gives_no_step():
+    floor = corridor_floor()
+    distance_map = DistanceMap(floor, 8, 1, max_distance=5)
+    assert distance_map.distance(2, 1) is None
+    assert distance_map.step_from(2, 1) is None
+
+
+def test_distance_map_is_cached_per_target():
+    floor = corridor_floor()
+    first = distance_map_to(floor, 8, 1)
+    assert distance_map_to(floor, 8, 1) is first
+    assert distance_map_to(floor, 7, 1) is not first
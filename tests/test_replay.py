@@ -0,0 +1,96 @@
+import random
+
+import os
+
+from game_session import GameSession
+from replay import TICK, Recorder, read_recording, replay, verify
+from save_game import deserialize, serialize
+
+
+def play(session, rng, turns, ticks=False):
+    for _ in range(turns):
+        if not session.running:
+            break
+        if ticks and rng.random() < 0.7:
+            session.tick()
+            continue
+        for event in session.step(rng.choice(['w', 'a', 's', 'd', ' ', 'e', 'g', 'f', 'i', None])):
+            if event.kind == 'dialog' and event.data['options']:
+                session.step('answer', rng.randrange(len(event.data['options'])))
+            if event.kind == 'inventory' and event.data['items']:
+                session.step('use', 0)
+
+
+def record(path, session, turns, **kwargs):
+    recorder = Recorder(str(path), session, **kwargs)
+    recorder.attach(session)
+    play(session, random.Random(1), turns)
+    recorder.close(session)
+    return read_recording(str(path))
+
+
+def test_negative_seed_is_recorded_and_replayed(tmp_path):
+    session = GameSession(seed=-1, prefetch=False)
+    recording = record(tmp_path / 'game.rec', session, 300)
+    assert recording.seed == -1
+    replayed, _ = replay(recording)
+    assert verify(recording, replayed)
+
+
+def test_turn_based_game_replays_exactly(tmp_path):
+    session = GameSession(seed=11, prefetch=False)
+    recorder = Recorder(str(tmp_path / 'game.rec'), session)
+    recorder.attach(session)
+    play(session, random.Random(1), 1000)
+    # Выбор в диалоге и инвентаре, в том числе отмена и номер вне списка
+    for choice in (0, -1, 5, 1000):
+        session.step('answer', choice)
+        session.step('use', choice)
+    play(session, random.Random(2), 1000)
+    recorder.close(session)
+
+    recording = read_recording(str(tmp_path / 'game.rec'))
+    assert ('answer', -1) in recording.actions and ('use', 1000) in recording.actions
+    replayed, _ = replay(recording)
+    assert recording.final_turn == session.turn
+    assert verify(recording, replayed)
+
+
+def test_realtime_ticks_are_run_length_encoded(tmp_path):
+    session = GameSession(seed=11, prefetch=False)
+    session.realtime = True
+    path = tmp_path / 'game.rec'
+    recorder = Recorder(str(path), session, realtime=True)
+    recorder.attach(session)
+    play(session, random.Random(1), 500, ticks=True)
+    for _ in range(70000):  # длиннее одной серии (0xFFFF тактов)
+        session.tick()
+    session.step('w')
+    recorder.close(session)
+
+    recording = read_recording(str(path))
+    assert recording.realtime
+    assert recording.actions[-70001:] == [(TICK, None)] * 70000 + [('w', None)]
+    # Серия тактов занимает 3 байта, а не байт на такт
+    assert os.path.getsize(path) < len(recording.actions) // 100
+    replayed, _ = replay(recording)
+    assert verify(recording, replayed)
+
+
+def test_loaded_game_replays_from_save_data(tmp_path):
+    start = GameSession(seed=12, prefetch=False)
+    play(start, random.Random(2), 300)
+    data = serialize(start)
+    session = deserialize(data, prefetch=False)
+    recording = record(tmp_path / 'game.rec', session, 500, save_data=data)
+    assert recording.save_data == data
+    replayed, _ = replay(recording)
+    assert verify(recording, replayed)
+
+
+def test_changed_recording_fails_verification(tmp_path):
+    session = GameSession(seed=11, prefetch=False)
+    recording = record(tmp_path / 'game.rec', session, 300)
+    recording.actions = recording.actions[:-20]
+    replayed, _ = replay(recording)
+    assert not verify(recording, replayed)
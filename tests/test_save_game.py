@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from game_session import GameSession
+from save_game import SaveError, deserialize, load_game, save_game, serialize
+
+
+def play(session, rng, turns):
+    for _ in range(turns):
+        if not session.running:
+            break
+        for event in session.step(rng.choice('wasd wasd egfi')):
+            if event.kind == 'dialog' and event.data['options']:
+                session.step('answer', 0)
+            if event.kind == 'inventory' and event.data['items']:
+                session.step('use', len(event.data['items']) - 1)
+
+
+def test_round_trip_keeps_state():
+    session = GameSession(seed=11, prefetch=False)
+    play(session, random.Random(2), 500)
+    data = serialize(session)
+    assert serialize(deserialize(data, prefetch=False)) == data
+
+
+def test_loaded_game_plays_on_identically(tmp_path):
+    session = GameSession(seed=11, prefetch=False)
+    play(session, random.Random(2), 300)
+    path = str(tmp_path / 'game.sav')
+    save_game(session, path)
+    loaded = load_game(path)
+    play(session, random.Random(9), 300)
+    play(loaded, random.Random(9), 300)
+    assert serialize(loaded) == serialize(session)
+    loaded.close()
+
+
+def test_truncated_save_is_rejected():
+    data = serialize(GameSession(seed=1, prefetch=False))
+    with pytest.raises(SaveError):
+        deserialize(data[:-10])
+
+
+def test_negative_seed_round_trip(tmp_path):
+    session = GameSession(seed=-1, prefetch=False)
+    play(session, random.Random(3), 100)
+    path = str(tmp_path / 'game.sav')
+    save_game(session, path)
+    loaded = load_game(path)
+    assert loaded.seed == -1
+    assert serialize(loaded) == serialize(session)
+    loaded.close()
@@ -0,0 +1,71 @@
+import glyphs
+from entities import HostileEnemy, Player
+from map_generator import Floor, Room, Tile
+from scheduler import EnemyScheduler
+from spatial_index import EnemyIndex
+
+
+def two_rooms_floor():
+    # Открытый этаж с двумя комнатами: A (2..10, 2..10) и B (40..48, 2..10)
+    floor = Floor(60, 20)
+    floor.tile_types[:] = bytes([Tile.FLOOR]) * (60 * 20)
+    floor.rooms = [Room(2, 2, 8, 8), Room(40, 2, 8, 8)]
+    return floor
+
+
+def dog(x, y):
+    enemy = HostileEnemy(x, y, glyphs.DOG, "Злая собака", hp=20, defense=0, power=3, view_range=8)
+    enemy.current_floor = 0
+    return enemy
+
+
+def setup(*enemies, sleep_radius=16):
+    floor = two_rooms_floor()
+    index = EnemyIndex(enemies)
+    player = Player(3, 3)
+    return floor, player, EnemyScheduler([floor], index, sleep_radius)
+
+
+def test_room_wakes_together():
+    seen, unseen, other_room, corridor = dog(4, 4), dog(9, 9), dog(44, 5), dog(25, 15)
+    floor, player, scheduler = setup(seen, unseen, other_room, corridor)
+    floor.update_fov(player.x, player.y)
+    assert not floor.is_visible(unseen.x, unseen.y)
+
+    awake = scheduler.update(player)
+    # Видна часть комнаты A - просыпается вся комната, включая врага вне поля зрения
+    assert set(awake) == {seen, unseen}
+    sleeping, _ = scheduler.snapshot()
+    assert set(sleeping) == {other_room, corridor}
+
+
+def test_corridor_enemy_wakes_only_when_seen():
+    corridor = dog(14, 14)
+    floor, player, scheduler = setup(corridor)
+    floor.update_fov(player.x, player.y)
+    assert scheduler.update(player) == []
+    player.x, player.y = 14, 11
+    floor.update_fov(player.x, player.y)
+    assert scheduler.update(player) == [corridor]
+
+
+def test_enemy_sleeps_past_sleep_radius():
+    near, far = dog(4, 4), dog(9, 9)
+    floor, player, scheduler = setup(near, far, sleep_radius=10)
+    floor.update_fov(player.x, player.y)
+    assert set(scheduler.update(player)) == {near, far}
+
+    far.x, far.y = 30, 15  # ушел дальше sleep_radius
+    assert scheduler.update(player) == [near]
+    assert far in scheduler.snapshot()[0]
+
+
+def test_changing_floor_puts_everyone_to_sleep():
+    near = dog(4, 4)
+    floor, player, scheduler = setup(near)
+    floor.update_fov(player.x, player.y)
+    assert scheduler.update(player) == [near]
+    player.current_floor = 1
+    scheduler.dungeon.append(Floor(60, 20))
+    assert scheduler.update(player) == []
+    assert near in scheduler.snapshot()[0]